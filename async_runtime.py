@@ -0,0 +1,30 @@
+import asyncio
+import threading
+from typing import Any, AsyncIterator, Coroutine, Iterator, Optional
+
+# Event loop shared by synchronous callers, so pooled connections outlive a single question
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_lock = threading.Lock()
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """Get the process-wide background event loop, starting it on first use."""
+    global _loop
+    if _loop is None:
+        with _lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="async-runtime", daemon=True).start()
+                _loop = loop
+    return _loop
+
+def run_sync(coro: Coroutine, timeout: Optional[float] = None) -> Any:
+    """Run coro on the background event loop and wait for its result."""
+    return asyncio.run_coroutine_threadsafe(coro, get_loop()).result(timeout)
+
+def iterate_sync(iterator: AsyncIterator) -> Iterator:
+    """Consume an async iterator on the background event loop, one item at a time."""
+    while True:
+        try:
+            yield run_sync(iterator.__anext__())
+        except StopAsyncIteration:
+            return
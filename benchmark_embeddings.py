@@ -0,0 +1,61 @@
+import os
+import time
+import yaml
+from dotenv import load_dotenv
+from ingest.load_docs import load_documents
+from chunker import iter_chunks
+from embedders import create_embedding_backend, cosine_similarities
+
+load_dotenv()
+
+SAMPLE_TEXTS = [
+    "How do I filter the acquisition dashboard by cost center?",
+    "The system displays the weekly leadership report with budget totals.",
+    "User Workflow: Navigate to the KPI reporting page and select a date range.",
+    "Unbudgeted acquisitions are flagged for approval in the pipeline view.",
+]
+
+def load_sample_texts(limit: int = 256) -> list:
+    """Sample chunk texts from the local corpus, falling back to built-in sentences."""
+    docs = load_documents(os.getenv('MDS_DIR', './data/mds')) + load_documents(os.getenv('DOCS_DIR', './data/docs'))
+    texts = []
+    for chunk in iter_chunks(docs, 256, 32):
+        texts.append(chunk['content'])
+        if len(texts) >= limit:
+            break
+    return texts or SAMPLE_TEXTS * 16
+
+def measure(backend, texts: list, batch_size: int):
+    """Encode texts and return (vectors, texts per second)."""
+    backend.encode(texts[:batch_size], batch_size=batch_size)  # Warm up
+    start = time.perf_counter()
+    vectors = backend.encode(texts, batch_size=batch_size)
+    return vectors, len(texts) / (time.perf_counter() - start)
+
+def main():
+    with open("config.yaml", 'r') as f:
+        config = yaml.safe_load(f)
+    
+    embedding_config = config['embedding']
+    batch_size = embedding_config['batch_size']
+    tolerance = embedding_config.get('onnx', {}).get('parity_tolerance', 0.99)
+    texts = load_sample_texts()
+    print(f"Benchmarking {embedding_config['model']} on {len(texts)} texts (batch size {batch_size})")
+    
+    torch_backend = create_embedding_backend({**embedding_config, 'backend': 'sentence_transformers'})
+    reference, torch_rate = measure(torch_backend, texts, batch_size)
+    print(f"sentence_transformers: {torch_rate:.1f} texts/sec")
+    
+    for quantize in (False, True):
+        onnx_config = {**embedding_config.get('onnx', {}), 'quantize': quantize}
+        onnx_backend = create_embedding_backend({**embedding_config, 'backend': 'onnx', 'onnx': onnx_config})
+        vectors, rate = measure(onnx_backend, texts, batch_size)
+        similarities = cosine_similarities(reference, vectors)
+        worst = min(similarities)
+        status = "OK" if worst >= tolerance else "FAIL"
+        label = "onnx int8" if quantize else "onnx fp32"
+        print(f"{label}: {rate:.1f} texts/sec ({rate / torch_rate:.2f}x), "
+              f"cosine min {worst:.4f} / mean {sum(similarities) / len(similarities):.4f} [{status}]")
+
+if __name__ == "__main__":
+    main()
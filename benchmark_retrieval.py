@@ -0,0 +1,67 @@
+import json
+import random
+import sys
+import time
+from dotenv import load_dotenv
+from bm25_index import tokenize
+from hybrid_search import hybrid_search
+from simple_embedding import SimpleEmbeddingService
+
+load_dotenv()
+
+def known_item_queries(bm25_index, limit: int = 200, terms_per_query: int = 3, seed: int = 0) -> list:
+    """Build queries from each sampled chunk's rarest terms; the chunk's source is the expected hit."""
+    random.seed(seed)
+    chunk_ids = random.sample(bm25_index.ids(), min(limit, len(bm25_index)))
+    queries = []
+    for id_ in chunk_ids:
+        chunk = bm25_index.get(id_)
+        terms = sorted(set(tokenize(chunk['content'])), key=bm25_index.document_frequency)
+        if terms:
+            queries.append({'query': ' '.join(terms[:terms_per_query]), 'source': chunk['metadata'].get('source')})
+    return queries
+
+def load_queries(path: str) -> list:
+    """Load labeled queries, one JSON object per line with 'query' and the expected 'source'."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def evaluate(name: str, search, queries: list, k: int):
+    """Print recall@k and latency percentiles for search(query, k)."""
+    hits = 0
+    latencies = []
+    for item in queries:
+        start = time.perf_counter()
+        results = search(item['query'], k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += any(result['metadata'].get('source') == item['source'] for result in results)
+    
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2]
+    p95 = latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)]
+    print(f"{name}: recall@{k} {hits / len(queries):.3f}, latency p50 {p50:.1f}ms / p95 {p95:.1f}ms")
+
+def main():
+    service = SimpleEmbeddingService()
+    retrieval_config = service.config['retrieval']
+    k = retrieval_config['top_k']
+    
+    queries = load_queries(sys.argv[1]) if len(sys.argv) > 1 else known_item_queries(service.bm25_index)
+    if not queries:
+        print("No queries to run; ingest documents first or pass a JSONL file of labeled queries.")
+        return
+    
+    print(f"Benchmarking retrieval on {len(queries)} queries ({len(service.bm25_index)} chunks in the BM25 index)")
+    service.get_embedding("warmup")
+    evaluate("dense", lambda query, n: service.search(query, n_results=n), queries, k)
+    evaluate("bm25", lambda query, n: service.bm25_index.search(query, n), queries, k)
+    evaluate("hybrid", lambda query, n: hybrid_search(
+        query,
+        lambda n_results: service.search(query, n_results=n_results),
+        service.bm25_index,
+        retrieval_config,
+        n_results=n
+    ), queries, k)
+
+if __name__ == "__main__":
+    main()
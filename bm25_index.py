@@ -0,0 +1,205 @@
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from retrieval_filters import matches_where
+
+# Lowercased word terms; identifiers and cost-center codes stay whole
+TERM_PATTERN = re.compile(r'\w+')
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercased BM25 terms."""
+    return [term.lower() for term in TERM_PATTERN.findall(text)]
+
+class BM25Index:
+    """BM25 inverted index over chunks, kept in SQLite so it stays on disk and every process reads the latest commit."""
+    
+    def __init__(self, path: Optional[str] = None, k1: float = 1.5, b: float = 0.75):
+        self.path = Path(path) if path else None
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        if self.path:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(self.path) if self.path else ':memory:', check_same_thread=False)
+        if self.path:
+            # Serving processes keep reading while an ingest writes
+            self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS chunks "
+            "(id TEXT PRIMARY KEY, source TEXT, content TEXT, metadata TEXT, length INTEGER)"
+        )
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS postings "
+            "(term TEXT, id TEXT, frequency INTEGER, PRIMARY KEY (term, id)) WITHOUT ROWID"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS postings_id ON postings (id)")
+        # Chunk count and total length, kept current so searches don't scan the chunks table
+        self.db.execute("CREATE TABLE IF NOT EXISTS info (key TEXT PRIMARY KEY, value INTEGER)")
+        self.db.commit()
+    
+    def __len__(self) -> int:
+        return self._stats()[0]
+    
+    def __contains__(self, id_: str) -> bool:
+        with self._lock:
+            return self.db.execute("SELECT 1 FROM chunks WHERE id = ?", (id_,)).fetchone() is not None
+    
+    def _stats(self):
+        with self._lock:
+            info = dict(self.db.execute("SELECT key, value FROM info"))
+        return info.get('count', 0), info.get('total_length', 0)
+    
+    def _update_stats(self, count: int, total_length: int):
+        count_before, total_before = self._stats()
+        self.db.executemany(
+            "INSERT OR REPLACE INTO info (key, value) VALUES (?, ?)",
+            [('count', count_before + count), ('total_length', total_before + total_length)]
+        )
+    
+    def get_sources(self) -> Dict[str, str]:
+        """Map every indexed chunk ID to its source."""
+        with self._lock:
+            return dict(self.db.execute("SELECT id, source FROM chunks"))
+    
+    def get(self, id_: str) -> Optional[Dict[str, Any]]:
+        """Get an indexed chunk's content and metadata."""
+        with self._lock:
+            row = self.db.execute("SELECT content, metadata FROM chunks WHERE id = ?", (id_,)).fetchone()
+        return {'id': id_, 'content': row[0], 'metadata': json.loads(row[1])} if row else None
+    
+    def ids(self) -> List[str]:
+        """IDs of every indexed chunk."""
+        with self._lock:
+            return [id_ for id_, in self.db.execute("SELECT id FROM chunks")]
+    
+    def document_frequency(self, term: str) -> int:
+        """Number of chunks containing term."""
+        with self._lock:
+            return self.db.execute("SELECT COUNT(*) FROM postings WHERE term = ?", (term,)).fetchone()[0]
+    
+    def add(self, ids: List[str], documents: List[str], metadatas: List[Dict[str, Any]]):
+        """Index chunks, replacing any already stored under the same IDs; persist() commits them."""
+        with self._lock:
+            count, total_length = self._remove(ids)
+            for id_, document, metadata in zip(ids, documents, metadatas):
+                terms = Counter(tokenize(document))
+                length = sum(terms.values())
+                self.db.execute(
+                    "INSERT OR REPLACE INTO chunks (id, source, content, metadata, length) VALUES (?, ?, ?, ?, ?)",
+                    (id_, metadata.get('source'), document, json.dumps(metadata), length)
+                )
+                self.db.executemany(
+                    "INSERT OR REPLACE INTO postings (term, id, frequency) VALUES (?, ?, ?)",
+                    [(term, id_, frequency) for term, frequency in terms.items()]
+                )
+                count += 1
+                total_length += length
+            self._update_stats(count, total_length)
+    
+    def remove(self, ids: List[str]):
+        """Drop chunks from the index; persist() commits the removal."""
+        with self._lock:
+            self._update_stats(*self._remove(ids))
+    
+    def _remove(self, ids: List[str]):
+        """Delete chunks and return the (negative) change in chunk count and total length."""
+        count = total_length = 0
+        for id_ in ids:
+            row = self.db.execute("SELECT length FROM chunks WHERE id = ?", (id_,)).fetchone()
+            if row is None:
+                continue
+            self.db.execute("DELETE FROM chunks WHERE id = ?", (id_,))
+            self.db.execute("DELETE FROM postings WHERE id = ?", (id_,))
+            count -= 1
+            total_length -= row[0]
+        return count, total_length
+    
+    def search(self, query: str, n_results: int = 5, where: Optional[Dict[str, Any]] = None) -> List[Dict]:
+        """Rank chunks by BM25 score for query, optionally filtered by a Chroma-style where clause."""
+        with self._lock:
+            count, total_length = self._stats()
+            if not count:
+                return []
+            
+            average_length = total_length / count
+            scores: Dict[str, float] = {}
+            # An average-length chunk containing each query term once scores the sum of their idfs; lexical_score
+            # is relative to that, so it says how much of the query's term weight a chunk matched
+            max_score = 0.0
+            for term in set(tokenize(query)):
+                postings = self.db.execute(
+                    "SELECT postings.id, frequency, length FROM postings JOIN chunks ON chunks.id = postings.id "
+                    "WHERE term = ?", (term,)
+                ).fetchall()
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                max_score += idf
+                for id_, frequency, length in postings:
+                    length_norm = 1 - self.b + self.b * length / average_length
+                    scores[id_] = scores.get(id_, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + self.k1 * length_norm)
+            
+            ranked = sorted(scores, key=scores.get, reverse=True)
+            results = []
+            # Content is read from disk only for the top-ranked chunks, a page at a time until enough pass the filter
+            page_size = max(n_results, 50)
+            for start in range(0, len(ranked), page_size):
+                page = ranked[start:start + page_size]
+                chunks = {
+                    id_: (content, metadata)
+                    for id_, content, metadata in self.db.execute(
+                        f"SELECT id, content, metadata FROM chunks WHERE id IN ({', '.join('?' * len(page))})", page
+                    )
+                }
+                for id_ in page:
+                    content, metadata = chunks[id_]
+                    metadata = json.loads(metadata)
+                    if not matches_where(metadata, where):
+                        continue
+                    results.append({
+                        'id': id_,
+                        'content': content,
+                        'metadata': metadata,
+                        'score': scores[id_],
+                        'lexical_score': min(scores[id_] / max_score, 1.0)
+                    })
+                    if len(results) >= n_results:
+                        return results
+            return results
+    
+    def reset(self):
+        """Delete every chunk in the index."""
+        with self._lock:
+            self.db.execute("DELETE FROM chunks")
+            self.db.execute("DELETE FROM postings")
+            self.db.execute("DELETE FROM info")
+            self.db.commit()
+    
+    def persist(self):
+        """Commit pending adds and removals, making them visible to other processes."""
+        with self._lock:
+            self.db.commit()
+
+# Process-wide indexes by path, shared by every service
+_indexes: Dict[str, BM25Index] = {}
+_lock = threading.Lock()
+
+def get_bm25_index(config: Dict[str, Any]) -> BM25Index:
+    """Get the process-wide BM25 index for config.yaml's retrieval.hybrid section."""
+    hybrid_config = config.get('retrieval', {}).get('hybrid', {})
+    path = os.getenv('BM25_INDEX_PATH', hybrid_config.get('bm25_path', './data/bm25_index.sqlite'))
+    index = _indexes.get(path)
+    if index is None:
+        with _lock:
+            index = _indexes.get(path)
+            if index is None:
+                index = _indexes[path] = BM25Index(
+                    path,
+                    k1=hybrid_config.get('bm25_k1', 1.5),
+                    b=hybrid_config.get('bm25_b', 0.75)
+                )
+    return index
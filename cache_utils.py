@@ -2,8 +2,12 @@ import redis
 import json
 import hashlib
 import os
-import pickle
-from typing import Optional, Any, List
+import struct
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Optional, Any, Dict, List, Iterable, Tuple
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -24,24 +28,214 @@ redis_binary_client = redis.Redis(
     decode_responses=False
 )
 
+class LocalCache:
+    """Bounded in-process LRU cache with per-entry TTL, layered in front of Redis."""
+    
+    def __init__(self, max_size: int, ttl: int):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.redis_hits = 0
+        self.redis_misses = 0
+    
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+    
+    def set(self, key: str, value: Any, ttl: int = None):
+        ttl = min(ttl, self.ttl) if ttl else self.ttl
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    
+    def record_redis(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.redis_hits += 1
+            else:
+                self.redis_misses += 1
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "local_hits": self.hits,
+                "local_misses": self.misses,
+                "redis_hits": self.redis_hits,
+                "redis_misses": self.redis_misses
+            }
+
+# In-process tier per key namespace, so hot keys skip the Redis round trip
+LOCAL_CACHES = {
+    namespace: LocalCache(
+        max_size=int(os.getenv("LOCAL_CACHE_SIZE", 1024)),
+        ttl=int(os.getenv("LOCAL_CACHE_TTL", 300))
+    )
+    for namespace in ("embedding", "llm_response", "crawl", "rerank")
+}
+
+def get_cache_stats() -> Dict[str, Dict[str, int]]:
+    """Get hit/miss counters for each cache namespace."""
+    return {namespace: cache.stats() for namespace, cache in LOCAL_CACHES.items()}
+
+# Bumped by ingestion whenever the vector store changes; corpus-dependent cache keys embed it
+INDEX_GENERATION_KEY = "index:generation"
+GENERATION_REFRESH_SECONDS = float(os.getenv("GENERATION_REFRESH_SECONDS", 5))
+GENERATIONAL_PREFIXES = ("llm_response", "semantic_cache")
+RECLAIM_INTERVAL = int(os.getenv("CACHE_RECLAIM_INTERVAL", 600))
+
+_generation = {"value": 0, "checked_at": float("-inf"), "reclaimed_at": float("-inf")}
+_generation_lock = threading.Lock()
+
+def get_index_generation() -> int:
+    """Current index generation, re-read from Redis at most every GENERATION_REFRESH_SECONDS."""
+    with _generation_lock:
+        if time.monotonic() - _generation["checked_at"] < GENERATION_REFRESH_SECONDS:
+            return _generation["value"]
+        _generation["checked_at"] = time.monotonic()
+    
+    try:
+        generation = int(redis_client.get(INDEX_GENERATION_KEY) or 0)
+    except Exception:
+        return _generation["value"]
+    with _generation_lock:
+        reclaim = generation != _generation["value"] or time.monotonic() - _generation["reclaimed_at"] > RECLAIM_INTERVAL
+        _generation["value"] = generation
+        if reclaim:
+            _generation["reclaimed_at"] = time.monotonic()
+    if reclaim:
+        reclaim_old_generations()
+    return generation
+
+def bump_index_generation() -> int:
+    """Start a new index generation, invalidating every corpus-dependent cache entry at once."""
+    try:
+        generation = int(redis_client.incr(INDEX_GENERATION_KEY))
+    except Exception:
+        return _generation["value"]
+    with _generation_lock:
+        _generation["value"] = generation
+        _generation["checked_at"] = _generation["reclaimed_at"] = time.monotonic()
+    reclaim_old_generations()
+    return generation
+
+def _key_generation(key: str) -> Optional[int]:
+    """Generation embedded in a cache key like 'llm_response:g12:<hash>', or None for other keys."""
+    parts = key.split(":", 2)
+    if len(parts) > 2 and parts[1][:1] == "g" and parts[1][1:].isdigit():
+        return int(parts[1][1:])
+    return None
+
+def reclaim_old_generations(background: bool = True) -> Optional[threading.Thread]:
+    """Delete cache entries of earlier index generations, at most once per RECLAIM_INTERVAL across processes."""
+    def reclaim():
+        try:
+            # Only one process reclaims per interval
+            if not redis_client.set("index:reclaim", 1, nx=True, ex=RECLAIM_INTERVAL):
+                return
+            current = int(redis_client.get(INDEX_GENERATION_KEY) or 0)
+            deleted = 0
+            for prefix in GENERATIONAL_PREFIXES:
+                batch = []
+                for key in redis_client.scan_iter(match=f"{prefix}:g*", count=1000):
+                    generation = _key_generation(key)
+                    if generation is not None and generation < current:
+                        batch.append(key)
+                    if len(batch) >= 500:
+                        deleted += redis_client.unlink(*batch)
+                        batch = []
+                if batch:
+                    deleted += redis_client.unlink(*batch)
+            if deleted:
+                print(f"Reclaimed {deleted} cache entries from index generations before {current}")
+        except Exception:
+            pass
+    
+    if not background:
+        reclaim()
+        return None
+    
+    thread = threading.Thread(target=reclaim, name="cache-reclaim", daemon=True)
+    thread.start()
+    return thread
+
 def generate_cache_key(query: str, context_data: Any, model: str) -> str:
-    """Generate a cache key for LLM responses."""
+    """Generate a cache key for LLM responses in the current index generation."""
     content = f"{query}:{json.dumps(context_data, sort_keys=True)}:{model}"
-    return f"llm_response:{hashlib.md5(content.encode()).hexdigest()}"
+    return f"llm_response:g{get_index_generation()}:{hashlib.md5(content.encode()).hexdigest()}"
+
+# Cached responses: a marker byte, a format version, then zlib-compressed JSON
+RESPONSE_FORMAT = b"\x00\x01"
+RESPONSE_PREVIEW_CHARS = int(os.getenv("RESPONSE_PREVIEW_CHARS", 300))
+
+def encode_response(response: Dict[str, Any]) -> bytes:
+    """Pack a response payload, capping source previews at RESPONSE_PREVIEW_CHARS."""
+    sources = [
+        {**source, "content_preview": source.get("content_preview", "")[:RESPONSE_PREVIEW_CHARS]}
+        for source in response.get("sources", [])
+    ]
+    data = json.dumps({**response, "sources": sources}, separators=(",", ":"), ensure_ascii=False)
+    return RESPONSE_FORMAT + zlib.compress(data.encode("utf-8"))
+
+def decode_response(value: bytes) -> Dict[str, Any]:
+    """Unpack a cached response payload."""
+    if value[:len(RESPONSE_FORMAT)] != RESPONSE_FORMAT:
+        raise ValueError(f"Unknown response cache format: {value[:len(RESPONSE_FORMAT)]!r}")
+    return json.loads(zlib.decompress(value[len(RESPONSE_FORMAT):]))
+
+def get_cached_response(query: str, context_data: Any, model: str) -> Optional[Dict[str, Any]]:
+    """Get cached LLM response payload (answer, sources, timing)."""
+    return get_cached_response_by_key(generate_cache_key(query, context_data, model))
 
-def get_cached_response(query: str, context_data: Any, model: str) -> Optional[str]:
-    """Get cached LLM response."""
+def get_cached_response_by_key(cache_key: str) -> Optional[Dict[str, Any]]:
+    """Get cached LLM response payload stored under a key from generate_cache_key."""
+    local_cache = LOCAL_CACHES["llm_response"]
+    cached = local_cache.get(cache_key)
+    if cached is not None:
+        return dict(cached)
+    
     try:
-        cache_key = generate_cache_key(query, context_data, model)
-        return redis_client.get(cache_key)
+        value = redis_binary_client.get(cache_key)
     except Exception:
         return None
+    if value is not None:
+        # A corrupt or unreadable entry is a miss; the answer is regenerated and overwritten
+        try:
+            cached = decode_response(value)
+        except Exception:
+            value = None
+    local_cache.record_redis(value is not None)
+    if value is None:
+        return None
+    local_cache.set(cache_key, cached)
+    return dict(cached)
 
-def cache_response(query: str, context_data: Any, model: str, response: str, ttl: int = 3600):
-    """Cache LLM response with TTL (default 1 hour)."""
+def cache_response(query: str, context_data: Any, model: str, response: Dict[str, Any], ttl: int = None):
+    """Cache LLM response payload until the next re-index, or for ttl (default RESPONSE_CACHE_TTL) seconds if set."""
+    ttl = ttl or int(os.getenv("RESPONSE_CACHE_TTL", 0)) or None
+    if isinstance(response, str):
+        response = {"answer": response, "sources": []}
+    cache_key = generate_cache_key(query, context_data, model)
+    LOCAL_CACHES["llm_response"].set(cache_key, response, ttl)
     try:
-        cache_key = generate_cache_key(query, context_data, model)
-        redis_client.setex(cache_key, ttl, response)
+        redis_binary_client.set(cache_key, encode_response(response), ex=ttl or None)
     except Exception:
         pass  # Fail silently if caching fails
 
@@ -49,44 +243,151 @@ def generate_content_hash(content: str) -> str:
     """Generate hash for content to use as cache key."""
     return hashlib.sha256(content.encode()).hexdigest()
 
-def cache_embedding(content: str, embedding: List[float], ttl: int = None) -> None:
-    """Cache embedding vector for content."""
+# Packed embedding formats: one tag byte followed by little-endian floats
+EMBEDDING_FORMATS = {
+    "float32": (b"f", "<{}f", 4),
+    "float16": (b"e", "<{}e", 2),
+}
+
+def encode_embedding(embedding: List[float]) -> bytes:
+    """Pack an embedding into the compact binary cache format."""
+    tag, fmt, _ = EMBEDDING_FORMATS[os.getenv("EMBEDDING_CACHE_DTYPE", "float32")]
+    return tag + struct.pack(fmt.format(len(embedding)), *embedding)
+
+def decode_embedding(value: bytes) -> List[float]:
+    """Unpack a cached embedding."""
+    for tag, fmt, size in EMBEDDING_FORMATS.values():
+        if value[:1] == tag:
+            return list(struct.unpack(fmt.format((len(value) - 1) // size), value[1:]))
+    raise ValueError(f"Unknown embedding cache format: {value[:1]!r}")
+
+def _embedding_cache_key(content: str, model: str) -> str:
+    return f"embedding:{model}:{generate_content_hash(content)}"
+
+def cache_embedding(content: str, model: str, embedding: List[float], ttl: int = None) -> None:
+    """Cache embedding vector for content, as encoded by model (see embedders.embedding_model_key)."""
+    cache_embeddings([(content, embedding)], model, ttl)
+
+def get_cached_embedding(content: str, model: str) -> Optional[List[float]]:
+    """Get cached embedding for content, as encoded by model."""
+    return get_cached_embeddings([content], model)[0]
+
+def cache_embeddings(pairs: Iterable[Tuple[str, List[float]]], model: str, ttl: int = None) -> None:
+    """Cache many (content, embedding) pairs in one pipelined round trip."""
+    ttl = ttl or int(os.getenv("EMBEDDING_CACHE_TTL", 86400))
+    local_cache = LOCAL_CACHES["embedding"]
     try:
-        content_hash = generate_content_hash(content)
-        cache_key = f"embedding:{content_hash}"
-        ttl = ttl or int(os.getenv("EMBEDDING_CACHE_TTL", 86400))
-        redis_binary_client.setex(cache_key, ttl, pickle.dumps(embedding))
+        pipe = redis_binary_client.pipeline(transaction=False)
+        for content, embedding in pairs:
+            cache_key = _embedding_cache_key(content, model)
+            local_cache.set(cache_key, embedding, ttl)
+            pipe.setex(cache_key, ttl, encode_embedding(embedding))
+        pipe.execute()
     except Exception:
         pass
 
-def get_cached_embedding(content: str) -> Optional[List[float]]:
-    """Get cached embedding for content."""
+def get_cached_embeddings(contents: List[str], model: str) -> List[Optional[List[float]]]:
+    """Get cached embeddings for many contents, with a single MGET for local misses."""
+    local_cache = LOCAL_CACHES["embedding"]
+    cache_keys = [_embedding_cache_key(content, model) for content in contents]
+    embeddings = [local_cache.get(cache_key) for cache_key in cache_keys]
+    missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+    if not missing:
+        return embeddings
+    
     try:
-        content_hash = generate_content_hash(content)
-        cache_key = f"embedding:{content_hash}"
-        cached = redis_binary_client.get(cache_key)
-        return pickle.loads(cached) if cached else None
+        values = redis_binary_client.mget([cache_keys[i] for i in missing])
     except Exception:
-        return None
+        return embeddings
+    for i, value in zip(missing, values):
+        if value:
+            # A corrupt or unreadable entry is a miss; it is re-encoded and overwritten
+            try:
+                embeddings[i] = decode_embedding(value)
+            except Exception:
+                value = None
+        local_cache.record_redis(value is not None)
+        if value:
+            local_cache.set(cache_keys[i], embeddings[i])
+    return embeddings
+
+def _rerank_cache_key(query: str, model: str, chunk_id: str) -> str:
+    return f"rerank:{hashlib.md5(f'{model}:{query}'.encode()).hexdigest()}:{chunk_id}"
+
+def cache_rerank_scores(query: str, model: str, scores: Dict[str, float], ttl: int = 86400) -> None:
+    """Cache cross-encoder scores for (query, chunk ID) pairs in one pipelined round trip."""
+    local_cache = LOCAL_CACHES["rerank"]
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        for chunk_id, score in scores.items():
+            cache_key = _rerank_cache_key(query, model, chunk_id)
+            local_cache.set(cache_key, score, ttl)
+            pipe.setex(cache_key, ttl, repr(score))
+        pipe.execute()
+    except Exception:
+        pass
+
+def get_cached_rerank_scores(query: str, model: str, chunk_ids: List[str]) -> Dict[str, float]:
+    """Get cached cross-encoder scores for query, keyed by chunk ID; uncached chunks are omitted."""
+    local_cache = LOCAL_CACHES["rerank"]
+    scores = {}
+    missing = []
+    for chunk_id in chunk_ids:
+        score = local_cache.get(_rerank_cache_key(query, model, chunk_id))
+        if score is None:
+            missing.append(chunk_id)
+        else:
+            scores[chunk_id] = score
+    if not missing:
+        return scores
+    
+    try:
+        values = redis_client.mget([_rerank_cache_key(query, model, chunk_id) for chunk_id in missing])
+    except Exception:
+        return scores
+    for chunk_id, value in zip(missing, values):
+        local_cache.record_redis(value is not None)
+        if value is not None:
+            scores[chunk_id] = float(value)
+            local_cache.set(_rerank_cache_key(query, model, chunk_id), scores[chunk_id])
+    return scores
+
+def _crawl_cache_key(url: str) -> str:
+    return f"crawl:{hashlib.md5(url.encode()).hexdigest()}"
 
 def cache_crawled_content(url: str, content: str, ttl: int = 86400) -> None:
     """Cache crawled web content."""
+    cache_key = _crawl_cache_key(url)
+    LOCAL_CACHES["crawl"].set(cache_key, content, ttl)
     try:
-        cache_key = f"crawl:{hashlib.md5(url.encode()).hexdigest()}"
         redis_client.setex(cache_key, ttl, content)
     except Exception:
         pass
 
 def get_cached_crawled_content(url: str) -> Optional[str]:
     """Get cached crawled content."""
+    cache_key = _crawl_cache_key(url)
+    local_cache = LOCAL_CACHES["crawl"]
+    cached = local_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
     try:
-        cache_key = f"crawl:{hashlib.md5(url.encode()).hexdigest()}"
-        return redis_client.get(cache_key)
+        cached = redis_client.get(cache_key)
     except Exception:
         return None
+    local_cache.record_redis(cached is not None)
+    if cached is not None:
+        local_cache.set(cache_key, cached)
+    return cached
 
 def clear_cache_pattern(pattern: str = "llm_response:*"):
     """Clear cached responses matching pattern."""
+    namespace = pattern.split(":", 1)[0]
+    for name, local_cache in LOCAL_CACHES.items():
+        if namespace in (name, "*"):
+            local_cache.clear()
+    
     try:
         keys = redis_client.keys(pattern)
         if keys:
@@ -0,0 +1,71 @@
+import re
+from collections import deque
+from typing import Dict, Iterable, Iterator
+from cache_utils import generate_content_hash
+
+# Section headings written by convert_csv_to_md.py
+SECTION_PATTERN = re.compile(r'^## Business Requirement \d+[ \t]*$', re.MULTILINE)
+
+# Word-level tokens; a lower bound on the embedding model's word pieces, which split rarer words further
+TOKEN_PATTERN = re.compile(r'\w+|[^\w\s]')
+
+def count_tokens(text: str) -> int:
+    """Count approximate tokens in text."""
+    return sum(1 for _ in TOKEN_PATTERN.finditer(text))
+
+def split_sections(text: str) -> Iterator[str]:
+    """Split generated markdown on its Business Requirement headings."""
+    start = 0
+    for match in SECTION_PATTERN.finditer(text):
+        if match.start() > start:
+            yield text[start:match.start()]
+        start = match.start()
+    yield text[start:]
+
+def split_window(text: str, chunk_size: int, chunk_overlap: int) -> Iterator[str]:
+    """Split text into windows of chunk_size tokens overlapping by chunk_overlap tokens."""
+    step = max(chunk_size - chunk_overlap, 1)
+    window = deque()
+    last_end = 0
+    emitted = False
+    
+    for match in TOKEN_PATTERN.finditer(text):
+        window.append(match.start())
+        last_end = match.end()
+        if len(window) == chunk_size:
+            yield text[window[0]:last_end]
+            emitted = True
+            for _ in range(step):
+                window.popleft()
+    
+    # Emit the tail unless it is fully covered by the previous window
+    if window and (not emitted or len(window) > chunk_overlap):
+        yield text[window[0]:last_end]
+
+def chunk_text(text: str, chunk_size: int, chunk_overlap: int) -> Iterator[str]:
+    """Yield chunks of text, keeping Business Requirement sections intact when they fit."""
+    for section in split_sections(text):
+        section = section.strip()
+        if not section:
+            continue
+        if count_tokens(section) <= chunk_size:
+            yield section
+        else:
+            yield from split_window(section, chunk_size, chunk_overlap)
+
+def chunk_id(source: str, content: str) -> str:
+    """Content-addressed ID for a chunk: stable across runs, unique per source."""
+    return generate_content_hash(f"{source}:{generate_content_hash(content)}")
+
+def iter_chunks(documents: Iterable[Dict[str, str]], chunk_size: int, chunk_overlap: int) -> Iterator[Dict]:
+    """Lazily chunk documents, yielding one chunk dict at a time."""
+    for doc in documents:
+        for index, chunk in enumerate(chunk_text(doc['content'], chunk_size, chunk_overlap)):
+            yield {
+                'content': chunk,
+                'source': doc['source'],
+                'filename': doc['filename'],
+                'type': doc['type'],
+                'chunk_index': index,
+                'token_count': count_tokens(chunk)
+            }
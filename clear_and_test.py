@@ -10,15 +10,10 @@ print("Clearing ChromaDB and re-indexing documents...")
 # Initialize embedding service
 embedding_service = SimpleEmbeddingService()
 
-# Delete existing collection and recreate
-try:
-    embedding_service.chroma_client.delete_collection("documents")
-    print("✅ Cleared old data")
-except:
-    print("ℹ️ No existing collection to clear")
-
-# Recreate collection
-embedding_service.collection = embedding_service.chroma_client.get_or_create_collection("documents")
+# Delete existing data
+embedding_service.vector_store.reset()
+embedding_service.bm25_index.reset()
+print("✅ Cleared old data")
 
 # Load only local documents
 docs = load_documents(os.getenv('DOCS_DIR', './data/mds'))
@@ -0,0 +1,98 @@
+import re
+from typing import Any, Dict, List, Tuple
+from chunker import TOKEN_PATTERN, count_tokens
+
+SEPARATOR = "\n\n"
+
+# Where a truncated chunk may end
+SENTENCE_END = re.compile(r'[.!?](?=\s)|\n')
+
+def chunk_tokens(result: Dict) -> int:
+    """Token count of a retrieved chunk, precomputed at ingest when available."""
+    token_count = result.get('metadata', {}).get('token_count')
+    return token_count if token_count is not None else count_tokens(result['content'])
+
+def relevance(result: Dict) -> float:
+    """The most refined score a retrieval stage gave the chunk."""
+    for key in ('rerank_score', 'rrf_score', 'score'):
+        if result.get(key) is not None:
+            return result[key]
+    return 0.0
+
+def shingles(text: str, size: int) -> set:
+    """Overlapping word n-grams of text, lowercased."""
+    words = [word.lower() for word in re.findall(r'\w+', text)]
+    if len(words) <= size:
+        return {tuple(words)}
+    return {tuple(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+def jaccard(a: set, b: set) -> float:
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """Cut text to at most max_tokens tokens, at a sentence end if one is in the kept text."""
+    end = 0
+    for i, match in enumerate(TOKEN_PATTERN.finditer(text)):
+        if i == max_tokens:
+            break
+        end = match.end()
+    kept = text[:end]
+    sentence_ends = [match.end() for match in SENTENCE_END.finditer(kept + " ")]
+    return kept[:sentence_ends[-1]].rstrip() if sentence_ends else kept
+
+class ContextPacker:
+    """Fill the prompt's token budget with the best-scoring distinct chunks."""
+    
+    def __init__(self, context_config: Dict[str, Any], llm_config: Dict[str, Any]):
+        self.context_window = llm_config.get('context_window', 8192)
+        self.max_tokens = llm_config.get('max_tokens', 800)
+        self.max_context_tokens = context_config.get('max_tokens')
+        self.prompt_overhead = context_config.get('prompt_overhead_tokens', 64)
+        self.dedup_threshold = context_config.get('dedup_threshold', 0.8)
+        self.shingle_size = context_config.get('shingle_size', 3)
+    
+    def budget(self, *prompt_parts: str) -> int:
+        """Context tokens left once the completion and the rest of the prompt are accounted for."""
+        budget = self.context_window - self.max_tokens - self.prompt_overhead - sum(count_tokens(part) for part in prompt_parts)
+        # A smaller context keeps time-to-first-token down even when the window allows more
+        if self.max_context_tokens:
+            budget = min(budget, self.max_context_tokens)
+        return max(budget, 0)
+    
+    def pack(self, results: List[Dict], budget: int) -> Tuple[str, List[Dict]]:
+        """Join chunks into a context of at most budget tokens; returns it with the chunks used."""
+        packed, packed_shingles = [], []
+        parts = []
+        remaining = budget
+        separator_tokens = count_tokens(SEPARATOR)
+        
+        for result in sorted(results, key=relevance, reverse=True):
+            if remaining <= 0:
+                break
+            
+            # Overlapping windows and the same text from several sources add nothing
+            result_shingles = shingles(result['content'], self.shingle_size)
+            if any(jaccard(result_shingles, seen) >= self.dedup_threshold for seen in packed_shingles):
+                continue
+            
+            tokens = chunk_tokens(result) + (separator_tokens if parts else 0)
+            if tokens <= remaining:
+                content = result['content']
+            elif not parts:
+                # Better part of the best chunk than no context at all
+                content = truncate_tokens(result['content'], remaining)
+                tokens = remaining
+            else:
+                # A smaller, lower-scored chunk may still fit
+                continue
+            
+            parts.append(content)
+            packed.append(result)
+            packed_shingles.append(result_shingles)
+            remaining -= tokens
+        
+        return SEPARATOR.join(parts), packed
+
+def get_context_packer(config: Dict[str, Any]) -> ContextPacker:
+    """Context packer from config.yaml's retrieval.context and llm sections."""
+    return ContextPacker(config.get('retrieval', {}).get('context', {}), config.get('llm', {}))
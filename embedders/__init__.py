@@ -0,0 +1,47 @@
+import math
+from typing import Any, Dict, List
+from model_registry import get_model
+from .base import BaseEmbeddingBackend
+from .sentence_transformer_backend import SentenceTransformerBackend
+from .onnx_backend import ONNXEmbeddingBackend
+
+BACKENDS = {
+    "sentence_transformers": SentenceTransformerBackend,
+    "onnx": ONNXEmbeddingBackend,
+}
+
+def create_embedding_backend(embedding_config: Dict[str, Any]) -> BaseEmbeddingBackend:
+    """Create the embedding backend selected by config.yaml's embedding section."""
+    backend = embedding_config.get('backend', 'sentence_transformers')
+    if backend == 'onnx':
+        onnx_config = embedding_config.get('onnx', {})
+        return ONNXEmbeddingBackend(
+            embedding_config['model'],
+            onnx_dir=onnx_config.get('path', './data/onnx'),
+            quantize=onnx_config.get('quantize', True),
+            threads=onnx_config.get('threads', 0)
+        )
+    return BACKENDS[backend](embedding_config['model'])
+
+def embedding_model_key(embedding_config: Dict[str, Any]) -> str:
+    """Identify the vectors a config produces, so cached embeddings from another backend or model are not reused."""
+    backend = embedding_config.get('backend', 'sentence_transformers')
+    key = f"{backend}:{embedding_config['model']}"
+    if backend == 'onnx' and embedding_config.get('onnx', {}).get('quantize', True):
+        key += ":int8"
+    return key
+
+def get_embedding_backend(embedding_config: Dict[str, Any]) -> BaseEmbeddingBackend:
+    """Get the shared embedding backend for this config, creating it on first use."""
+    backend = embedding_config.get('backend', 'sentence_transformers')
+    return get_model(f"backend:{backend}:{embedding_config['model']}",
+                     lambda: create_embedding_backend(embedding_config))
+
+def cosine_similarities(reference: List[List[float]], candidate: List[List[float]]) -> List[float]:
+    """Pairwise cosine similarity between two lists of vectors."""
+    similarities = []
+    for a, b in zip(reference, candidate):
+        dot = sum(x * y for x, y in zip(a, b))
+        norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+        similarities.append(dot / norm if norm else 0.0)
+    return similarities
@@ -0,0 +1,19 @@
+from abc import ABC, abstractmethod
+from typing import List
+
+class BaseEmbeddingBackend(ABC):
+    """Base class for embedding backends."""
+    
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+    
+    @property
+    @abstractmethod
+    def max_seq_length(self) -> int:
+        """Maximum number of model tokens per input."""
+        pass
+    
+    @abstractmethod
+    def encode(self, texts: List[str], batch_size: int = 32) -> List[List[float]]:
+        """Encode texts into embedding vectors."""
+        pass
@@ -0,0 +1,106 @@
+import json
+from pathlib import Path
+from typing import List
+from model_registry import get_embedding_model
+from .base import BaseEmbeddingBackend
+
+class ONNXEmbeddingBackend(BaseEmbeddingBackend):
+    """ONNX Runtime CPU backend with optional int8 dynamic quantization."""
+    
+    def __init__(self, model_name: str, onnx_dir: str = "./data/onnx", quantize: bool = True,
+                 threads: int = 0, normalize: bool = True):
+        super().__init__(model_name)
+        self.model_dir = Path(onnx_dir) / model_name.replace('/', '_')
+        self.quantize = quantize
+        self.normalize = normalize
+        
+        model_path = self.model_dir / ("model.int8.onnx" if quantize else "model.onnx")
+        if not model_path.exists():
+            export_onnx(model_name, self.model_dir, quantize)
+        
+        import onnxruntime
+        from tokenizers import Tokenizer
+        
+        with open(self.model_dir / "export.json", 'r') as f:
+            self._max_seq_length = json.load(f)['max_seq_length']
+        
+        self.tokenizer = Tokenizer.from_file(str(self.model_dir / "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=self._max_seq_length)
+        pad_id = self.tokenizer.token_to_id("[PAD]") or 0
+        self.tokenizer.enable_padding(pad_id=pad_id, pad_token="[PAD]")
+        
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(
+            str(model_path), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+    
+    @property
+    def max_seq_length(self) -> int:
+        return self._max_seq_length
+    
+    def encode(self, texts: List[str], batch_size: int = 32) -> List[List[float]]:
+        import numpy as np
+        
+        embeddings = []
+        for start in range(0, len(texts), batch_size):
+            encodings = self.tokenizer.encode_batch(texts[start:start + batch_size])
+            inputs = {
+                "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+                "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+                "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+            }
+            hidden = self.session.run(None, {k: v for k, v in inputs.items() if k in self.input_names})[0]
+            
+            # Mean pooling over real tokens, matching the sentence-transformers pooling layer
+            mask = inputs["attention_mask"][..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            if self.normalize:
+                pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            embeddings.extend(pooled.tolist())
+        
+        return embeddings
+
+def export_onnx(model_name: str, model_dir: Path, quantize: bool = True):
+    """Export the sentence-transformers model to ONNX, optionally int8-quantized."""
+    import torch
+    
+    print(f"Exporting {model_name} to ONNX in {model_dir}...")
+    model_dir.mkdir(parents=True, exist_ok=True)
+    st_model = get_embedding_model(model_name)
+    transformer = st_model[0]
+    
+    class LastHiddenState(torch.nn.Module):
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+        
+        def forward(self, input_ids, attention_mask, token_type_ids):
+            return self.model(
+                input_ids=input_ids, attention_mask=attention_mask, token_type_ids=token_type_ids
+            )[0]
+    
+    sample = transformer.tokenizer(["ONNX export sample"], return_tensors="pt", return_token_type_ids=True)
+    input_names = ["input_ids", "attention_mask", "token_type_ids"]
+    model_path = model_dir / "model.onnx"
+    with torch.no_grad():
+        torch.onnx.export(
+            LastHiddenState(transformer.auto_model.eval()),
+            tuple(sample[name] for name in input_names),
+            str(model_path),
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes={name: {0: "batch", 1: "sequence"} for name in input_names + ["last_hidden_state"]},
+            opset_version=14
+        )
+    
+    transformer.tokenizer.save_pretrained(str(model_dir))
+    with open(model_dir / "export.json", 'w') as f:
+        json.dump({"model_name": model_name, "max_seq_length": st_model.max_seq_length}, f)
+    
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(str(model_path), str(model_dir / "model.int8.onnx"), weight_type=QuantType.QInt8)
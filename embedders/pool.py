@@ -0,0 +1,59 @@
+import multiprocessing
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Dict, List
+
+# Backend held by each worker process
+_worker_backend = None
+
+def _init_worker(embedding_config: Dict[str, Any], threads: int):
+    """Pin the worker's thread count and load its own copy of the model."""
+    global _worker_backend
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ[var] = str(threads)
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    
+    from embedders import create_embedding_backend
+    onnx_config = {**embedding_config.get('onnx', {}), 'threads': threads}
+    _worker_backend = create_embedding_backend({**embedding_config, 'onnx': onnx_config})
+
+def _encode(texts: List[str], batch_size: int) -> List[List[float]]:
+    return _worker_backend.encode(texts, batch_size=batch_size)
+
+def _max_seq_length() -> int:
+    return _worker_backend.max_seq_length
+
+class EmbeddingPool:
+    """Pool of worker processes that each hold a model copy, for bulk ingestion."""
+    
+    def __init__(self, embedding_config: Dict[str, Any]):
+        self.workers = embedding_config.get('workers', 1)
+        threads = embedding_config.get('threads_per_worker') or max(1, (os.cpu_count() or 1) // self.workers)
+        # Enough batches in flight to keep every worker busy while results are consumed in order
+        self.max_in_flight = self.workers * 2
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(embedding_config, threads)
+        )
+    
+    def submit(self, texts: List[str], batch_size: int) -> Future:
+        """Encode texts on a worker, returning a future of the vectors."""
+        return self.executor.submit(_encode, texts, batch_size)
+    
+    def max_seq_length(self) -> int:
+        return self.executor.submit(_max_seq_length).result()
+    
+    def close(self):
+        self.executor.shutdown()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
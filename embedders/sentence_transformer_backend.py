@@ -0,0 +1,17 @@
+from typing import List
+from model_registry import get_embedding_model
+from .base import BaseEmbeddingBackend
+
+class SentenceTransformerBackend(BaseEmbeddingBackend):
+    """PyTorch sentence-transformers backend."""
+    
+    @property
+    def model(self):
+        return get_embedding_model(self.model_name)
+    
+    @property
+    def max_seq_length(self) -> int:
+        return self.model.max_seq_length
+    
+    def encode(self, texts: List[str], batch_size: int = 32) -> List[List[float]]:
+        return self.model.encode(texts, batch_size=batch_size).tolist()
@@ -1,12 +1,14 @@
 import os
-from typing import List, Dict
-from llama_index.core import Document, VectorStoreIndex, Settings
-from llama_index.vector_stores.chroma import ChromaVectorStore
-import chromadb
-from cache_utils import cache_embedding, get_cached_embedding
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional
+from llama_index.core import Document, VectorStoreIndex, Settings, StorageContext
+from cache_utils import cache_embedding, get_cached_embedding, cache_embeddings, get_cached_embeddings, bump_index_generation
 import yaml
 from dotenv import load_dotenv
-from sentence_transformers import SentenceTransformer
+from embedders import embedding_model_key, get_embedding_backend
+from vector_stores import get_vector_store
+from bm25_index import get_bm25_index
+from chunker import chunk_id, count_tokens
 
 load_dotenv()
 
@@ -15,62 +17,124 @@ class EmbeddingService:
         with open(config_path, 'r') as f:
             self.config = yaml.safe_load(f)
         
-        # Use local sentence-transformers for embeddings
-        self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+        # ChromaDB or the embedded local index, per config.yaml's vector_store section
+        self.vector_store = get_vector_store(self.config)
         
-        # Initialize ChromaDB HTTP client
-        self.chroma_client = chromadb.HttpClient(
-            host=os.getenv('CHROMA_HOST', 'localhost'),
-            port=int(os.getenv('CHROMA_PORT', '8000'))
-        )
-        self.collection = self.chroma_client.get_or_create_collection("documents")
+        # Lexical index over the same chunks, for hybrid retrieval
+        self.bm25_index = get_bm25_index(self.config)
         
         # Configure LlamaIndex
         Settings.chunk_size = self.config['ingestion']['chunk_size']
         Settings.chunk_overlap = self.config['ingestion']['chunk_overlap']
     
+    @property
+    def embedder(self):
+        """Shared embedding backend selected in config.yaml, loaded on first use."""
+        return get_embedding_backend(self.config['embedding'])
+    
+    @property
+    def embedding_model(self) -> str:
+        """Cache namespace for this config's embeddings: backend, model and quantization."""
+        return embedding_model_key(self.config['embedding'])
+    
     def get_embedding_with_cache(self, text: str) -> List[float]:
         """Get embedding with Redis caching."""
         # Check cache first
-        cached_embedding = get_cached_embedding(text)
+        cached_embedding = get_cached_embedding(text, self.embedding_model)
         if cached_embedding:
             return cached_embedding
         
         # Generate new embedding
-        embedding = self.embedding_model.encode(text).tolist()
+        embedding = self.embedder.encode([text])[0]
         
         # Cache the result
-        cache_embedding(text, embedding)
+        cache_embedding(text, self.embedding_model, embedding)
         
         return embedding
     
-    def create_index(self, documents: List[Dict[str, str]]) -> VectorStoreIndex:
-        """Create vector index from documents."""
-        # Convert to LlamaIndex documents
-        llama_docs = []
-        for doc in documents:
-            llama_doc = Document(
-                text=doc['content'],
-                metadata={
-                    'source': doc['source'],
-                    'filename': doc['filename'],
-                    'type': doc['type']
-                }
-            )
-            llama_docs.append(llama_doc)
+    def get_embeddings_with_cache(self, texts: List[str]) -> List[List[float]]:
+        """Get embeddings for many texts with one Redis lookup and one batched encode."""
+        embeddings = get_cached_embeddings(texts, self.embedding_model)
+        missing = [i for i, embedding in enumerate(embeddings) if not embedding]
         
-        # Create vector store
-        vector_store = ChromaVectorStore(chroma_collection=self.collection)
+        if missing:
+            encoded = self.embedder.encode(
+                [texts[i] for i in missing],
+                batch_size=self.config['embedding']['batch_size']
+            )
+            for i, embedding in zip(missing, encoded):
+                embeddings[i] = embedding
+            cache_embeddings(((texts[i], embeddings[i]) for i in missing), self.embedding_model)
         
-        # Create index
-        index = VectorStoreIndex.from_documents(
-            llama_docs,
-            vector_store=vector_store
+        return embeddings
+    
+    def create_index(self, documents: Iterable[Dict[str, str]]) -> Optional[VectorStoreIndex]:
+        """Create vector index from documents, streamed in batches; None if there were none."""
+        # Create index in the configured vector store
+        storage_context = StorageContext.from_defaults(
+            vector_store=self.vector_store.as_llama_vector_store()
         )
+        index = VectorStoreIndex(
+            [],
+            storage_context=storage_context
+        )
+        
+        count = 0
+        batch_size = self.config['embedding']['batch_size']
+        for batch in _batched(documents, batch_size):
+            # Convert to LlamaIndex documents
+            llama_docs = []
+            for doc in batch:
+                llama_doc = Document(
+                    text=doc['content'],
+                    metadata={
+                        'source': doc['source'],
+                        'filename': doc['filename'],
+                        'type': doc['type']
+                    }
+                )
+                llama_docs.append(llama_doc)
+            
+            # Chunk once so the vector store and the BM25 index see the same nodes
+            nodes = Settings.node_parser.get_nodes_from_documents(llama_docs)
+            
+            # Content-addressed node IDs, so re-indexing replaces chunks in both indexes instead of adding copies
+            node_ids = {node.node_id: chunk_id(node.metadata['source'], node.get_content()) for node in nodes}
+            for node in nodes:
+                node.id_ = node_ids[node.node_id]
+                for related in node.relationships.values():
+                    if getattr(related, 'node_id', None) in node_ids:
+                        related.node_id = node_ids[related.node_id]
+            
+            for node in nodes:
+                # Lets the context packer budget prompts without re-tokenizing; kept out of embeddings and prompts
+                node.metadata['token_count'] = count_tokens(node.get_content())
+                node.excluded_embed_metadata_keys.append('token_count')
+                node.excluded_llm_metadata_keys.append('token_count')
+            self.bm25_index.add(
+                [node.node_id for node in nodes],
+                [node.get_content() for node in nodes],
+                [node.metadata for node in nodes]
+            )
+            index.insert_nodes(nodes)
+            count += len(batch)
+            print(f"Indexed {count} documents")
+        
+        if not count:
+            return None
+        self.bm25_index.persist()
+        
+        # Cached answers were built from the old corpus
+        bump_index_generation()
         
         return index
     
     def load_existing_index(self) -> VectorStoreIndex:
         """Load existing vector index."""
-        vector_store = ChromaVectorStore(chroma_collection=self.collection)
-        return VectorStoreIndex.from_vector_store(vector_store)
\ No newline at end of file
+        return VectorStoreIndex.from_vector_store(self.vector_store.as_llama_vector_store())
+
+def _batched(items: Iterable, size: int) -> Iterator[List]:
+    """Split items into lists of up to size items."""
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
\ No newline at end of file
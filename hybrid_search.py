@@ -0,0 +1,81 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, List, Optional
+from bm25_index import BM25Index
+
+# Lexical searches run here so they overlap with the dense query's embedding and I/O
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="bm25")
+
+def reciprocal_rank_fusion(result_lists: Dict[str, List[Dict]], k: int = 60, n_results: Optional[int] = None) -> List[Dict]:
+    """Merge named ranked result lists by reciprocal rank fusion, recording which lists returned each result."""
+    fused: Dict[str, Dict] = {}
+    for name, results in result_lists.items():
+        for rank, result in enumerate(results):
+            entry = fused.get(result['id'])
+            if entry is None:
+                entry = fused[result['id']] = {**result, 'rrf_score': 0.0, 'retrievers': []}
+            entry['rrf_score'] += 1.0 / (k + rank + 1)
+            entry['retrievers'].append(name)
+    
+    ranked = sorted(fused.values(), key=lambda entry: entry['rrf_score'], reverse=True)
+    return ranked[:n_results] if n_results else ranked
+
+def hybrid_search(query: str, dense_search: Callable[[int], List[Dict]], lexical_index: Optional[BM25Index],
+                  retrieval_config: Dict[str, Any], n_results: int = 5,
+                  where: Optional[Dict[str, Any]] = None) -> List[Dict]:
+    """Run dense_search(n_candidates) and a BM25 search in parallel and fuse their rankings."""
+    hybrid_config = retrieval_config.get('hybrid', {})
+    if not hybrid_config.get('enabled', True) or lexical_index is None or not len(lexical_index):
+        return dense_search(n_results)
+    
+    candidates = max(hybrid_config.get('candidates', 20), n_results)
+    start_time = time.perf_counter()
+    lexical_future = _executor.submit(lexical_index.search, query, candidates, where)
+    dense_results = dense_search(candidates)
+    
+    # BM25 results that miss the latency budget are dropped rather than delaying the answer
+    budget = hybrid_config.get('budget_ms', 50) / 1000
+    try:
+        lexical_results = lexical_future.result(timeout=max(budget - (time.perf_counter() - start_time), 0))
+    except FutureTimeoutError:
+        print(f"BM25 search exceeded its {budget * 1000:.0f}ms budget; using dense results only")
+        lexical_results = []
+    
+    return reciprocal_rank_fusion(
+        {'dense': dense_results, 'lexical': lexical_results},
+        k=hybrid_config.get('rrf_k', 60),
+        n_results=n_results
+    )
+
+
+def score_cutoff(results: List[Dict], retrieval_config: Dict[str, Any]) -> List[Dict]:
+    """Drop dense-only hits below retrieval.similarity_threshold or past the first score cliff, keeping rank order."""
+    threshold = retrieval_config.get('similarity_threshold')
+    cliff = retrieval_config.get('score_cliff')
+    lexical_min_score = retrieval_config.get('lexical_min_score', 0.5)
+    
+    def dense(result: Dict) -> bool:
+        # Fused results found by the dense search carry its cosine similarity as their score
+        return 'dense' in result.get('retrievers', ('dense',)) and result.get('score') is not None
+    
+    dense_scores = sorted((result['score'] for result in results if dense(result)), reverse=True)
+    floor = threshold if threshold is not None else float('-inf')
+    if cliff:
+        # Adaptive k: stop before the first gap of at least score_cliff between consecutive scores
+        for higher, lower in zip(dense_scores, dense_scores[1:]):
+            if higher - lower >= cliff:
+                floor = max(floor, higher)
+                break
+    
+    kept = []
+    for result in results:
+        if {'dense', 'lexical'} <= set(result.get('retrievers', ())):
+            # Found by both retrievers: the fused rank already vouches for it
+            kept.append(result)
+        elif dense(result):
+            if result['score'] >= floor:
+                kept.append(result)
+        elif result.get('lexical_score', 1.0) >= lexical_min_score:
+            # BM25-only hits have no cosine similarity; they must match most of the query's weighted terms
+            kept.append(result)
+    return kept
@@ -1,6 +1,6 @@
 import asyncio
 import aiohttp
-from typing import List, Dict, Set
+from typing import AsyncIterator, Dict, List, Optional, Set
 from urllib.parse import urljoin, urlparse
 from urllib.robotparser import RobotFileParser
 import trafilatura
@@ -30,29 +30,29 @@ class WebCrawler:
             return True
     
     async def fetch_page(self, session: aiohttp.ClientSession, url: str) -> str:
-        """Fetch and extract clean text from a webpage."""
+        """Fetch and extract clean text from a webpage; raises if the page could not be fetched."""
         # Check cache first
         cached_content = get_cached_crawled_content(url)
         if cached_content:
             return cached_content
         
-        try:
-            async with session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as response:
-                if response.status == 200:
-                    html = await response.text()
-                    # Extract clean text using trafilatura
-                    content = trafilatura.extract(html)
-                    if content:
-                        # Cache the extracted content
-                        cache_crawled_content(url, content)
-                        return content
-        except Exception as e:
-            print(f"Error fetching {url}: {e}")
+        async with session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as response:
+            # A page that is gone is simply not indexed; any other error leaves the crawl incomplete
+            if response.status in (404, 410):
+                return ""
+            response.raise_for_status()
+            html = await response.text()
         
+        # Extract clean text using trafilatura
+        content = trafilatura.extract(html)
+        if content:
+            # Cache the extracted content
+            cache_crawled_content(url, content)
+            return content
         return ""
     
-    async def crawl_urls(self, start_urls: List[str]) -> List[Dict[str, str]]:
-        """Crawl URLs and extract content."""
+    async def iter_urls(self, start_urls: List[str]) -> AsyncIterator[Dict[str, str]]:
+        """Crawl URLs concurrently, yielding each page's document as soon as it is extracted."""
         async with aiohttp.ClientSession() as session:
             tasks = []
             
@@ -62,22 +62,53 @@ class WebCrawler:
                 
                 if url not in self.visited_urls and self.can_fetch(url):
                     self.visited_urls.add(url)
-                    tasks.append(self._process_url(session, url))
+                    tasks.append(asyncio.ensure_future(self._process_url(session, url)))
+            
+            errors = []
+            try:
+                for task in asyncio.as_completed(tasks):
+                    try:
+                        document = await task
+                    except Exception as e:
+                        print(f"Error fetching {e}")
+                        errors.append(e)
+                        continue
+                    if document:
+                        yield document
+            finally:
+                for task in tasks:
+                    task.cancel()
             
-            await asyncio.gather(*tasks, return_exceptions=True)
+            # The pages that loaded are kept, but a partial crawl must not count as the site's full contents
+            if errors:
+                raise RuntimeError(f"{len(errors)} of {len(tasks)} pages could not be fetched; first error: {errors[0]}")
+    
+    async def crawl_urls(self, start_urls: List[str]) -> List[Dict[str, str]]:
+        """Crawl URLs and extract content."""
+        async for document in self.iter_urls(start_urls):
+            self.documents.append(document)
         
         return self.documents
     
-    async def _process_url(self, session: aiohttp.ClientSession, url: str):
+    async def _process_url(self, session: aiohttp.ClientSession, url: str) -> Optional[Dict[str, str]]:
         """Process a single URL."""
-        content = await self.fetch_page(session, url)
+        try:
+            content = await self.fetch_page(session, url)
+        except Exception as e:
+            raise RuntimeError(f"{url}: {e}") from e
         if content:
-            self.documents.append({
+            return {
                 'content': content,
                 'source': url,
                 'filename': urlparse(url).path.split('/')[-1] or 'index',
                 'type': 'web'
-            })
+            }
+        return None
+
+def iter_websites(urls: List[str], max_pages: int = 50, crawl_depth: int = 2) -> AsyncIterator[Dict[str, str]]:
+    """Crawl websites, yielding pages as they are extracted."""
+    crawler = WebCrawler(max_pages=max_pages, crawl_depth=crawl_depth)
+    return crawler.iter_urls(urls)
 
 async def crawl_websites(urls: List[str], max_pages: int = 50, crawl_depth: int = 2) -> List[Dict[str, str]]:
     """Main function to crawl websites."""
@@ -1,61 +1,58 @@
 import requests
 import base64
-from typing import List, Dict
+from typing import Dict, Iterator, List
 from cache_utils import cache_crawled_content, get_cached_crawled_content
 
-def load_azure_devops_wiki(organization: str, project: str, wiki_id: str, pat_token: str) -> List[Dict[str, str]]:
-    """Load pages from Azure DevOps Wiki."""
-    documents = []
+def iter_azure_devops_wiki(organization: str, project: str, wiki_id: str, pat_token: str) -> Iterator[Dict[str, str]]:
+    """Load pages from Azure DevOps Wiki, one at a time; raises if the wiki cannot be read."""
+    # Errors propagate, so the orchestrator reports the source as failed and its indexed pages are kept
     
-    try:
-        # Azure DevOps REST API
-        base_url = f"https://dev.azure.com/{organization}/{project}/_apis/wiki/wikis/{wiki_id}/pages"
-        
-        # PAT token authentication
-        auth_string = base64.b64encode(f":{pat_token}".encode()).decode()
-        headers = {
-            'Authorization': f'Basic {auth_string}',
-            'Content-Type': 'application/json'
-        }
-        
-        # Get all pages
-        response = requests.get(f"{base_url}?api-version=6.0&recursionLevel=full", headers=headers)
+    # Azure DevOps REST API
+    base_url = f"https://dev.azure.com/{organization}/{project}/_apis/wiki/wikis/{wiki_id}/pages"
+    
+    # PAT token authentication
+    auth_string = base64.b64encode(f":{pat_token}".encode()).decode()
+    headers = {
+        'Authorization': f'Basic {auth_string}',
+        'Content-Type': 'application/json'
+    }
+    
+    # Get all pages
+    response = requests.get(f"{base_url}?api-version=6.0&recursionLevel=full", headers=headers, timeout=30)
+    response.raise_for_status()
+    data = response.json()
+    
+    for page in data.get('value', []):
+        page_id = page.get('id')
+        page_path = page.get('path', '')
         
-        if response.status_code == 200:
-            data = response.json()
+        if page_id:
+            # Get page content
+            content_url = f"{base_url}/{page_id}?api-version=6.0&includeContent=true"
             
-            for page in data.get('value', []):
-                page_id = page.get('id')
-                page_path = page.get('path', '')
-                
-                if page_id:
-                    # Get page content
-                    content_url = f"{base_url}/{page_id}?api-version=6.0&includeContent=true"
-                    
-                    # Check cache first
-                    cached_content = get_cached_crawled_content(content_url)
-                    if cached_content:
-                        content = cached_content
-                    else:
-                        content_response = requests.get(content_url, headers=headers)
-                        if content_response.status_code == 200:
-                            page_data = content_response.json()
-                            content = page_data.get('content', '')
-                            cache_crawled_content(content_url, content)
-                        else:
-                            continue
-                    
-                    # Create web URL for the page
-                    web_url = f"https://dev.azure.com/{organization}/{project}/_wiki/wikis/{wiki_id}?pagePath={page_path}"
-                    
-                    documents.append({
-                        'content': content,
-                        'source': web_url,
-                        'filename': page_path.split('/')[-1] or 'Home',
-                        'type': 'azure_wiki'
-                    })
-        
-    except Exception as e:
-        print(f"Error loading Azure DevOps wiki: {e}")
-    
-    return documents
\ No newline at end of file
+            # Check cache first
+            cached_content = get_cached_crawled_content(content_url)
+            if cached_content:
+                content = cached_content
+            else:
+                content_response = requests.get(content_url, headers=headers, timeout=30)
+                if content_response.status_code == 404:
+                    continue  # Deleted since the page list was read
+                content_response.raise_for_status()
+                page_data = content_response.json()
+                content = page_data.get('content', '')
+                cache_crawled_content(content_url, content)
+            
+            # Create web URL for the page
+            web_url = f"https://dev.azure.com/{organization}/{project}/_wiki/wikis/{wiki_id}?pagePath={page_path}"
+            
+            yield {
+                'content': content,
+                'source': web_url,
+                'filename': page_path.split('/')[-1] or 'Home',
+                'type': 'azure_wiki'
+            }
+
+def load_azure_devops_wiki(organization: str, project: str, wiki_id: str, pat_token: str) -> List[Dict[str, str]]:
+    """Load pages from Azure DevOps Wiki."""
+    return list(iter_azure_devops_wiki(organization, project, wiki_id, pat_token))
\ No newline at end of file
@@ -1,11 +1,15 @@
 # Future implementation for Slack/Teams support chat ingestion
 # To ingest Slack/Teams support chats in future
 
-from typing import List, Dict
+from typing import Dict, Iterator, List
 
-def load_chat_logs(chat_dir: str) -> List[Dict[str, str]]:
-    """Load chat logs from Slack/Teams exports."""
+def iter_chat_logs(chat_dir: str) -> Iterator[Dict[str, str]]:
+    """Load chat logs from Slack/Teams exports, one at a time."""
     # TODO: Implement Slack/Teams chat log parsing
     # This will parse JSON exports from Slack/Teams
     # and extract relevant support conversations
-    return []
\ No newline at end of file
+    return iter([])
+
+def load_chat_logs(chat_dir: str) -> List[Dict[str, str]]:
+    """Load chat logs from Slack/Teams exports."""
+    return list(iter_chat_logs(chat_dir))
\ No newline at end of file
@@ -1,15 +1,14 @@
 import os
-from typing import List, Dict
+from typing import Dict, Iterator, List
 from pathlib import Path
 from docx import Document
 
-def load_documents(docs_dir: str) -> List[Dict[str, str]]:
-    """Load markdown and text documents from directory."""
-    documents = []
+def iter_documents(docs_dir: str) -> Iterator[Dict[str, str]]:
+    """Load markdown and text documents from directory, one at a time."""
     docs_path = Path(docs_dir)
     
     if not docs_path.exists():
-        return documents
+        return
     
     for file_path in docs_path.rglob("*"):
         if file_path.suffix.lower() in ['.md', '.txt', '.docx']:
@@ -23,13 +22,15 @@ def load_documents(docs_dir: str) -> List[Dict[str, str]]:
                     with open(file_path, 'r', encoding='utf-8') as f:
                         content = f.read()
                 
-                documents.append({
+                yield {
                     'content': content,
                     'source': str(file_path),
                     'filename': file_path.name,
                     'type': 'document'
-                })
+                }
             except Exception as e:
                 print(f"Error loading {file_path}: {e}")
-    
-    return documents
\ No newline at end of file
+
+def load_documents(docs_dir: str) -> List[Dict[str, str]]:
+    """Load markdown and text documents from directory."""
+    return list(iter_documents(docs_dir))
\ No newline at end of file
@@ -1,14 +1,13 @@
 import pandas as pd
-from typing import List, Dict
+from typing import Dict, Iterator, List
 from pathlib import Path
 
-def load_excel_testcases(excel_dir: str) -> List[Dict[str, str]]:
-    """Load test cases from Excel and CSV files as business knowledge."""
-    documents = []
+def iter_excel_testcases(excel_dir: str) -> Iterator[Dict[str, str]]:
+    """Load test cases from Excel and CSV files as business knowledge, one at a time."""
     excel_path = Path(excel_dir)
     
     if not excel_path.exists():
-        return documents
+        return
     
     # Process both Excel and CSV files
     for file_path in list(excel_path.rglob("*.xlsx")) + list(excel_path.rglob("*.csv")):
@@ -22,8 +21,9 @@ def load_excel_testcases(excel_dir: str) -> List[Dict[str, str]]:
             else:
                 # Read Excel file with all sheets
                 excel_file = pd.ExcelFile(file_path)
-                sheets_data = [(sheet_name, pd.read_excel(file_path, sheet_name=sheet_name)) 
-                              for sheet_name in excel_file.sheet_names]
+                # Read one sheet at a time as documents are consumed
+                sheets_data = ((sheet_name, pd.read_excel(excel_file, sheet_name=sheet_name))
+                               for sheet_name in excel_file.sheet_names)
             
             for sheet_name, df in sheets_data:
                 
@@ -73,14 +73,16 @@ def load_excel_testcases(excel_dir: str) -> List[Dict[str, str]]:
                 content += f"This module contains {len(df)} business scenarios covering functional requirements.\n"
                 content += f"Key business areas: {sheet_name}\n"
                 
-                documents.append({
+                yield {
                     'content': content,
                     'source': f"{file_path}#{sheet_name}",
                     'filename': f"Business Knowledge - {file_path.name} - {sheet_name}",
                     'type': 'business_knowledge'
-                })
-                
+                }
+        
         except Exception as e:
             print(f"Error loading file {file_path}: {e}")
-    
-    return documents
\ No newline at end of file
+
+def load_excel_testcases(excel_dir: str) -> List[Dict[str, str]]:
+    """Load test cases from Excel and CSV files as business knowledge."""
+    return list(iter_excel_testcases(excel_dir))
\ No newline at end of file
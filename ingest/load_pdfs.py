@@ -1,46 +1,173 @@
 import os
-from typing import List, Dict
+import multiprocessing
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional
 from pathlib import Path
 import pdfplumber
 from cache_utils import cache_crawled_content, get_cached_crawled_content
 
-def load_pdfs(pdf_dir: str) -> List[Dict[str, str]]:
-    """Load and parse PDF documents with caching."""
-    documents = []
+# Most extraction processes used by default; each holds a PDF open and competes with embedding for cores
+MAX_DEFAULT_WORKERS = 8
+
+def default_workers(reserved_cores: int = 0) -> int:
+    """Extraction processes for the cores not reserved for embedding, at most MAX_DEFAULT_WORKERS."""
+    return max(min((os.cpu_count() or 1) - reserved_cores, MAX_DEFAULT_WORKERS), 1)
+
+def _resolve_engine(engine: str) -> str:
+    """The text extraction engine to use: pypdfium2 when asked for (or 'auto') and installed, else pdfplumber."""
+    if engine not in ('auto', 'pdfium'):
+        return 'pdfplumber'
+    try:
+        import pypdfium2
+        return 'pdfium'
+    except ImportError:
+        if engine == 'pdfium':
+            print("pypdfium2 is not installed; extracting PDFs with pdfplumber")
+        return 'pdfplumber'
+
+def _page_count(file_path: Path, engine: str) -> int:
+    if engine == 'pdfium':
+        import pypdfium2 as pdfium
+        pdf = pdfium.PdfDocument(str(file_path))
+        try:
+            return len(pdf)
+        finally:
+            pdf.close()
+    with pdfplumber.open(file_path) as pdf:
+        return len(pdf.pages)
+
+def _extract_pdfium(file_path: str, page_numbers: List[int], table_path_threshold: int):
+    """Fast text-only extraction; returns the texts and the pages that need pdfplumber's layout handling."""
+    import pypdfium2 as pdfium
+    import pypdfium2.raw as pdfium_c
+    
+    texts, layout_pages = {}, []
+    pdf = pdfium.PdfDocument(file_path)
+    try:
+        for page_number in page_numbers:
+            page = pdf[page_number]
+            text = page.get_textpage().get_text_range().replace("\r\n", "\n").replace("\r", "\n")
+            # Ruling lines mark tables and forms, whose reading order pdfium does not reconstruct
+            paths = sum(1 for _ in page.get_objects(filter=(pdfium_c.FPDF_PAGEOBJ_PATH,)))
+            if not text.strip() or paths >= table_path_threshold:
+                layout_pages.append(page_number)
+            else:
+                texts[page_number] = text
+    finally:
+        pdf.close()
+    return texts, layout_pages
+
+def _extract_pdfplumber(file_path: str, page_numbers: List[int]) -> Dict[int, str]:
+    with pdfplumber.open(file_path, pages=[page_number + 1 for page_number in page_numbers]) as pdf:
+        return {page_number: page.extract_text() or "" for page_number, page in zip(page_numbers, pdf.pages)}
+
+def _extract_pages(file_path: str, start: int, end: int, file_key: str, engine: str,
+                   table_path_threshold: int) -> List[str]:
+    """Text of pages start to end - 1, extracting only those not cached yet; runs in a worker process."""
+    texts = {}
+    for page_number in range(start, end):
+        cached = get_cached_crawled_content(f"{file_key}:page:{page_number}")
+        if cached is not None:
+            texts[page_number] = cached
+    
+    missing = [page_number for page_number in range(start, end) if page_number not in texts]
+    if missing:
+        layout_pages = missing
+        if engine == 'pdfium':
+            pdfium_texts, layout_pages = _extract_pdfium(file_path, missing, table_path_threshold)
+            texts.update(pdfium_texts)
+        if layout_pages:
+            texts.update(_extract_pdfplumber(file_path, layout_pages))
+        for page_number in missing:
+            cache_crawled_content(f"{file_key}:page:{page_number}", texts[page_number])
+    
+    return [texts[page_number] for page_number in range(start, end)]
+
+def _pdf_document(file_path: Path, content: str) -> Optional[Dict[str, str]]:
+    if not content.strip():
+        return None
+    return {
+        'content': content,
+        'source': str(file_path),
+        'filename': file_path.name,
+        'type': 'pdf'
+    }
+
+def iter_pdfs(pdf_dir: str, pdf_config: Dict[str, Any] = None, reserved_cores: int = 0) -> Iterator[Dict[str, str]]:
+    """Load and parse PDF documents with caching, one at a time, extracting page ranges in parallel."""
+    pdf_config = pdf_config or {}
     pdf_path = Path(pdf_dir)
     
     if not pdf_path.exists():
-        return documents
+        return
     
-    for file_path in pdf_path.rglob("*.pdf"):
-        try:
-            # Check cache first
-            cache_key = f"pdf:{file_path.name}:{file_path.stat().st_mtime}"
-            cached_content = get_cached_crawled_content(cache_key)
-            
-            if cached_content:
-                content = cached_content
-            else:
-                # Extract text from PDF
-                content = ""
-                with pdfplumber.open(file_path) as pdf:
-                    for page in pdf.pages:
-                        page_text = page.extract_text()
-                        if page_text:
-                            content += page_text + "\n"
+    engine = _resolve_engine(pdf_config.get('engine', 'auto'))
+    workers = pdf_config.get('workers') or default_workers(reserved_cores)
+    pages_per_task = pdf_config.get('pages_per_task', 8)
+    table_path_threshold = pdf_config.get('table_path_threshold', 20)
+    
+    # Enough page ranges in flight to keep every worker busy while documents are yielded in order
+    max_in_flight = workers * 2
+    executor = None
+    pending = deque()
+    in_flight = 0
+    
+    def collect(file_path: Path, file_key: str, parts: List, content: Optional[str]) -> Optional[Dict[str, str]]:
+        """Reassemble a PDF's page ranges in page order and cache the whole text."""
+        if content is None:
+            try:
+                pages = [text for part in parts for text in (part.result() if isinstance(part, Future) else part)]
+            except Exception as e:
+                print(f"Error loading PDF {file_path}: {e}")
+                return None
+            content = "".join(text + "\n" for text in pages if text)
+            cache_crawled_content(file_key, content)
+        return _pdf_document(file_path, content)
+    
+    try:
+        for file_path in pdf_path.rglob("*.pdf"):
+            try:
+                # Check cache first; the engine is part of the key since engines extract different text
+                file_key = f"pdf:{file_path.name}:{file_path.stat().st_mtime}:{engine}"
+                content = get_cached_crawled_content(file_key)
+                parts = []
                 
-                # Cache the extracted content
-                cache_crawled_content(cache_key, content)
-            
-            if content.strip():
-                documents.append({
-                    'content': content,
-                    'source': str(file_path),
-                    'filename': file_path.name,
-                    'type': 'pdf'
-                })
+                if content is None:
+                    page_count = _page_count(file_path, engine)
+                    ranges = [(start, min(start + pages_per_task, page_count)) for start in range(0, page_count, pages_per_task)]
+                    if workers > 1:
+                        if executor is None:
+                            executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+                        parts = [
+                            executor.submit(_extract_pages, str(file_path), start, end, file_key, engine, table_path_threshold)
+                            for start, end in ranges
+                        ]
+                        in_flight += len(parts)
+                    else:
+                        parts = [_extract_pages(str(file_path), start, end, file_key, engine, table_path_threshold)
+                                 for start, end in ranges]
                 
-        except Exception as e:
-            print(f"Error loading PDF {file_path}: {e}")
-    
-    return documents
\ No newline at end of file
+                pending.append((file_path, file_key, parts, content))
+            except Exception as e:
+                print(f"Error loading PDF {file_path}: {e}")
+            
+            # Yield finished documents in order, waiting on the oldest once enough work is queued
+            while pending and (in_flight >= max_in_flight or not any(isinstance(part, Future) for part in pending[0][2])):
+                entry = pending.popleft()
+                in_flight -= sum(isinstance(part, Future) for part in entry[2])
+                document = collect(*entry)
+                if document:
+                    yield document
+        
+        while pending:
+            document = collect(*pending.popleft())
+            if document:
+                yield document
+    finally:
+        if executor:
+            executor.shutdown(cancel_futures=True)
+
+def load_pdfs(pdf_dir: str, pdf_config: Dict[str, Any] = None) -> List[Dict[str, str]]:
+    """Load and parse PDF documents with caching."""
+    return list(iter_pdfs(pdf_dir, pdf_config))
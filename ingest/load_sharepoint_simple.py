@@ -1,13 +1,11 @@
 import os
-from typing import List, Dict
+from typing import Dict, Iterator, List
 
-def load_sharepoint_exports(export_dir: str = "./data/sharepoint_exports") -> List[Dict[str, str]]:
-    """Load manually exported SharePoint documents."""
-    documents = []
-    
+def iter_sharepoint_exports(export_dir: str = "./data/sharepoint_exports") -> Iterator[Dict[str, str]]:
+    """Load manually exported SharePoint documents, one at a time."""
     if not os.path.exists(export_dir):
         print(f"SharePoint export directory not found: {export_dir}")
-        return documents
+        return
     
     # Load all text files from export directory
     for root, dirs, files in os.walk(export_dir):
@@ -18,13 +16,15 @@ def load_sharepoint_exports(export_dir: str = "./data/sharepoint_exports") -> Li
                     with open(file_path, 'r', encoding='utf-8') as f:
                         content = f.read()
                     
-                    documents.append({
+                    yield {
                         'content': content,
                         'source': file_path,
                         'filename': file,
                         'type': 'sharepoint_export'
-                    })
+                    }
                 except Exception as e:
                     print(f"Error reading {file_path}: {e}")
-    
-    return documents
\ No newline at end of file
+
+def load_sharepoint_exports(export_dir: str = "./data/sharepoint_exports") -> List[Dict[str, str]]:
+    """Load manually exported SharePoint documents."""
+    return list(iter_sharepoint_exports(export_dir))
\ No newline at end of file
@@ -0,0 +1,189 @@
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from async_runtime import get_loop
+
+# How a loader is run: blocking loaders on threads, coroutines and async generators on the loop;
+# CPU-bound loaders parallelize internally (see load_pdfs) so their documents still stream
+LOADER_KINDS = ('thread', 'async')
+
+class LoaderSource:
+    """A registered loader call and how to run it."""
+    
+    def __init__(self, name: str, loader: Callable, args: Tuple = (), kwargs: Dict[str, Any] = None,
+                 kind: str = 'thread', timeout: Optional[float] = None):
+        if kind not in LOADER_KINDS:
+            raise ValueError(f"Unknown loader kind '{kind}'; expected one of {LOADER_KINDS}")
+        self.name = name
+        self.loader = loader
+        self.args = args
+        self.kwargs = kwargs or {}
+        self.kind = kind
+        self.timeout = timeout
+
+class IngestOrchestrator:
+    """Runs registered loaders concurrently, isolating each source's failures and timeouts."""
+    
+    def __init__(self, orchestrator_config: Dict[str, Any] = None):
+        orchestrator_config = orchestrator_config or {}
+        self.default_timeout = orchestrator_config.get('timeout_s', 1800)
+        self.timeouts = orchestrator_config.get('timeouts', {})
+        self.thread_workers = orchestrator_config.get('thread_workers', 8)
+        self.queue_size = orchestrator_config.get('queue_size', 64)
+        self.sources: Dict[str, LoaderSource] = {}
+        self.reports: List[Dict[str, Any]] = []
+    
+    def register(self, name: str, loader: Callable, *args, kind: str = 'thread', timeout: Optional[float] = None, **kwargs):
+        """Register loader(*args, **kwargs) as the source name; per-source timeouts in config win over timeout."""
+        self.sources[name] = LoaderSource(
+            name, loader, args, kwargs, kind,
+            self.timeouts.get(name, timeout or self.default_timeout)
+        )
+    
+    def succeeded(self) -> bool:
+        """Whether the last run loaded every source completely, so sources missing from it were really removed."""
+        return len(self.reports) == len(self.sources) and all(report['status'] == 'ok' for report in self.reports)
+    
+    def iter_documents(self) -> Iterator[Dict[str, str]]:
+        """Stream documents from every source concurrently, as they load."""
+        # Loaders block on the bounded queue while the consumer is behind, so memory stays flat
+        documents = queue.Queue(maxsize=self.queue_size)
+        stopped = threading.Event()
+        abandoned = set()
+        # When each source last made progress; timeouts measure the loader's own inactivity
+        active_at = {}
+        
+        def touch(name: str):
+            active_at[name] = time.perf_counter()
+        
+        def emit(name: str, item) -> bool:
+            """Queue an item unless the run or the source was given up on; False tells the loader to stop."""
+            while not stopped.is_set() and name not in abandoned:
+                # Time spent waiting on a slow consumer is not the loader's
+                touch(name)
+                try:
+                    documents.put((name, item), timeout=0.1)
+                    touch(name)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        thread_pool = ThreadPoolExecutor(max_workers=self.thread_workers, thread_name_prefix="ingest")
+        
+        start_time = time.perf_counter()
+        reports = {}
+        for source in self.sources.values():
+            touch(source.name)
+            reports[source.name] = {'source': source.name, 'kind': source.kind, 'status': 'ok', 'documents': 0, 'error': None}
+            if source.kind == 'async':
+                asyncio.run_coroutine_threadsafe(self._produce_async(source, emit, touch), get_loop())
+            else:
+                thread_pool.submit(self._produce, source, emit, touch)
+        
+        pending = set(self.sources)
+        
+        def deadline(name: str) -> float:
+            return active_at[name] + self.sources[name].timeout
+        
+        try:
+            while pending:
+                try:
+                    name, item = documents.get(timeout=max(min(map(deadline, pending)) - time.perf_counter(), 0))
+                except queue.Empty:
+                    item = None
+                    name = None
+                
+                if name in abandoned:
+                    continue
+                if isinstance(item, _SourceDone):
+                    reports[name].update(status=item.status, error=item.error)
+                    self._finish(reports[name], start_time)
+                    pending.discard(name)
+                elif name is not None:
+                    reports[name]['documents'] += 1
+                    yield item
+                
+                # Blocking loaders cannot be interrupted; a timed-out one is abandoned and its documents discarded
+                now = time.perf_counter()
+                for expired in [name for name in pending if deadline(name) <= now]:
+                    abandoned.add(expired)
+                    reports[expired].update(status='timeout', error=f"made no progress for {self.sources[expired].timeout}s")
+                    self._finish(reports[expired], start_time)
+                    pending.discard(expired)
+        finally:
+            stopped.set()
+            # Don't wait on abandoned loaders
+            thread_pool.shutdown(wait=False, cancel_futures=True)
+            self.reports = list(reports.values())
+        
+        print_report(self.reports)
+    
+    def _produce(self, source: LoaderSource, emit: Callable, touch: Callable):
+        """Run a blocking loader, queueing its documents as it yields them."""
+        # The timeout starts once a worker picks the source up
+        touch(source.name)
+        loaded = None
+        try:
+            loaded = source.loader(*source.args, **source.kwargs) or []
+            for document in loaded:
+                if not emit(source.name, document):
+                    break
+            done = _SourceDone('ok')
+        except Exception as e:
+            done = _SourceDone('failed', str(e))
+        finally:
+            # Generator loaders stopped early release their files and connections
+            if hasattr(loaded, 'close'):
+                loaded.close()
+        emit(source.name, done)
+    
+    async def _produce_async(self, source: LoaderSource, emit: Callable, touch: Callable):
+        """Run a coroutine or async generator loader on the event loop, queueing its documents."""
+        touch(source.name)
+        try:
+            loaded = source.loader(*source.args, **source.kwargs)
+            if hasattr(loaded, '__aiter__'):
+                async for document in loaded:
+                    if not await asyncio.to_thread(emit, source.name, document):
+                        await loaded.aclose()
+                        break
+            else:
+                for document in await loaded or []:
+                    if not await asyncio.to_thread(emit, source.name, document):
+                        break
+            done = _SourceDone('ok')
+        except Exception as e:
+            done = _SourceDone('failed', str(e))
+        await asyncio.to_thread(emit, source.name, done)
+    
+    def _finish(self, report: Dict[str, Any], start_time: float):
+        """Record how long a source took and log its outcome."""
+        report['seconds'] = round(time.perf_counter() - start_time, 2)
+        if report['error']:
+            print(f"Source {report['source']} {report['status']}: {report['error']}")
+        else:
+            print(f"Loaded {report['documents']} documents from {report['source']} in {report['seconds']}s")
+    
+    async def run(self) -> Tuple[List[Dict[str, str]], List[Dict[str, Any]]]:
+        """Load every registered source into memory; returns all documents and one report per source."""
+        documents = await asyncio.to_thread(lambda: list(self.iter_documents()))
+        return documents, self.reports
+
+class _SourceDone:
+    """Queued by a loader when it finishes, successfully or not."""
+    
+    def __init__(self, status: str, error: Optional[str] = None):
+        self.status = status
+        self.error = error
+
+def print_report(reports: List[Dict[str, Any]]):
+    """Print a per-source summary of an ingestion run."""
+    print("Ingestion summary:")
+    for report in reports:
+        detail = f" ({report['error']})" if report['error'] else ""
+        print(f"  {report['source']:<12} {report['kind']:<8} {report['status']:<8} "
+              f"{report['documents']:>6} docs {report['seconds']:>8.2f}s{detail}")
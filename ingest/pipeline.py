@@ -0,0 +1,60 @@
+import queue
+import threading
+from typing import Iterable, Iterator, TypeVar
+
+T = TypeVar('T')
+
+_END = object()
+
+class _Failure:
+    """Carries the producer's exception to the consumer."""
+    
+    def __init__(self, error: BaseException):
+        self.error = error
+
+def prefetch(items: Iterable[T], maxsize: int = 4, name: str = "prefetch", join_timeout: float = 5.0) -> Iterator[T]:
+    """Produce items on a background thread, at most maxsize ahead of the consumer."""
+    # Lets one pipeline stage (e.g. embedding) run while the next (e.g. upserting) works on earlier items
+    buffer = queue.Queue(maxsize=maxsize)
+    stopped = threading.Event()
+    
+    def put(item) -> bool:
+        while not stopped.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def produce():
+        try:
+            for item in items:
+                if not put(item):
+                    return
+            put(_END)
+        except BaseException as e:
+            put(_Failure(e))
+        finally:
+            # Runs the source's own cleanup (e.g. closing loaders) on the thread that iterated it
+            close = getattr(items, 'close', None)
+            if close:
+                close()
+    
+    producer = threading.Thread(target=produce, name=name, daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is _END:
+                return
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+    finally:
+        # A consumer that stops early releases the producer; one blocked inside a stalled source is left to
+        # finish on its own (it is a daemon thread and closes the source once it gets control back)
+        stopped.set()
+        producer.join(join_timeout)
+        if producer.is_alive():
+            print(f"{name}: producer still waiting on its source after {join_timeout}s; not waiting for it")
@@ -2,83 +2,109 @@ import os
 import asyncio
 import yaml
 import json
-from typing import List, Dict
+from typing import AsyncIterator, Dict, Iterable, Iterator
 from dotenv import load_dotenv
+from sqlalchemy.exc import InterfaceError, OperationalError
 from sqlalchemy.orm import Session
 
-from ingest.load_docs import load_documents
-from ingest.load_pdfs import load_pdfs
-from ingest.crawler import crawl_websites
+from ingest.load_docs import iter_documents
+from ingest.load_pdfs import iter_pdfs
+from ingest.crawler import iter_websites
+from ingest.orchestrator import IngestOrchestrator
 from embedding_service import EmbeddingService
 from qa_service import QAService
 from database import create_tables, get_db, Document, ChatHistory
 from cache_utils import generate_content_hash
+from model_registry import warmup
+from async_runtime import run_sync
 
 load_dotenv()
-create_tables()
 
 class ChatbotApp:
     def __init__(self, config_path: str = "config.yaml"):
         with open(config_path, 'r') as f:
             self.config = yaml.safe_load(f)
         
+        # Not at import time: spawned PDF and embedding workers re-import the main module
+        create_tables()
+        
         self.embedding_service = EmbeddingService(config_path)
         self.qa_service = None
         self.index = None
     
-    async def ingest_all_data(self) -> List[Dict[str, str]]:
-        """Ingest data from all sources."""
-        all_documents = []
-        
-        # Load documents
-        print("Loading documents...")
-        docs = load_documents(os.getenv('DOCS_DIR', './data/docs'))
-        all_documents.extend(docs)
-        print(f"Loaded {len(docs)} documents")
+    async def ingest_all_data(self) -> Iterator[Dict[str, str]]:
+        """Stream documents from all sources, loaded concurrently and saved to PostgreSQL as they pass."""
+        orchestrator = IngestOrchestrator(self.config['ingestion'].get('orchestrator', {}))
         
-        # Load PDFs
-        print("Loading PDFs...")
-        pdfs = load_pdfs(os.getenv('PDF_DIR', './data/pdfs'))
-        all_documents.extend(pdfs)
-        print(f"Loaded {len(pdfs)} PDFs")
+        # Load documents and PDFs; PDF pages are extracted on their own process pool
+        orchestrator.register('docs', iter_documents, os.getenv('DOCS_DIR', './data/docs'))
+        orchestrator.register(
+            'pdfs', iter_pdfs, os.getenv('PDF_DIR', './data/pdfs'), self.config['ingestion'].get('pdf', {}),
+            reserved_cores=max(self.config['embedding'].get('workers', 1), 1)
+        )
         
         # Crawl websites
-        print("Crawling websites...")
-        web_docs = await crawl_websites(
-            self.config['crawling']['urls_to_crawl'],
+        orchestrator.register(
+            'web', iter_websites, self.config['crawling']['urls_to_crawl'], kind='async',
             max_pages=self.config['crawling']['max_pages'],
             crawl_depth=self.config['crawling']['crawl_depth']
         )
-        all_documents.extend(web_docs)
-        print(f"Crawled {len(web_docs)} web pages")
         
-        # Save documents to PostgreSQL
-        self._save_documents_to_db(all_documents)
-        
-        return all_documents
+        return self._save_documents_to_db(orchestrator.iter_documents())
     
-    def _save_documents_to_db(self, documents: List[Dict[str, str]]):
-        """Save documents to PostgreSQL."""
-        try:
-            db = next(get_db())
-            for doc in documents:
+    def _save_documents_to_db(self, documents: Iterable[Dict[str, str]], commit_every: int = 100) -> Iterator[Dict[str, str]]:
+        """Save documents to PostgreSQL as they stream past, committing every commit_every documents."""
+        db = None
+        pending = 0
+        unavailable = False
+        for doc in documents:
+            if unavailable:
+                yield doc  # Keep indexing without saving
+                continue
+            try:
+                db = db or next(get_db())
                 content_hash = generate_content_hash(doc['content'])
-                existing = db.query(Document).filter(Document.content_hash == content_hash).first()
-                
+                # Each document gets a savepoint, so a bad one doesn't roll back the others awaiting commit
+                with db.begin_nested():
+                    existing = db.query(Document).filter(Document.content_hash == content_hash).first()
+                    if not existing:
+                        db.add(Document(
+                            content_hash=content_hash,
+                            filename=doc['filename'],
+                            source=doc['source'],
+                            doc_type=doc['type'],
+                            content=doc['content']
+                        ))
                 if not existing:
-                    db_doc = Document(
-                        content_hash=content_hash,
-                        filename=doc['filename'],
-                        source=doc['source'],
-                        doc_type=doc['type'],
-                        content=doc['content']
-                    )
-                    db.add(db_doc)
+                    pending += 1
+            except (OperationalError, InterfaceError) as e:
+                # Every further document would fail the same way
+                print(f"PostgreSQL unavailable, not saving documents for the rest of this ingest: {e}")
+                if db:
+                    db.close()
+                db, unavailable = None, True
+                yield doc
+                continue
+            except Exception as e:
+                print(f"Error saving document to DB: {e}")
             
-            db.commit()
+            if pending >= commit_every:
+                self._commit_documents(db)
+                pending = 0
+            yield doc
+        
+        if db and self._commit_documents(db):
             print("Documents saved to PostgreSQL")
+    
+    def _commit_documents(self, db: Session) -> bool:
+        """Commit saved documents, rolling back on failure."""
+        try:
+            db.commit()
+            return True
         except Exception as e:
             print(f"Error saving documents to DB: {e}")
+            db.rollback()
+            return False
     
     async def initialize(self, force_reindex: bool = False):
         """Initialize the chatbot with data ingestion and indexing."""
@@ -86,13 +112,13 @@ class ChatbotApp:
             print("Starting data ingestion...")
             documents = await self.ingest_all_data()
             
-            if documents:
-                print(f"Creating index from {len(documents)} documents...")
-                self.index = self.embedding_service.create_index(documents)
-                print("Index created successfully!")
-            else:
+            # Documents flow straight from the loaders into the index, a batch at a time
+            print("Creating index...")
+            self.index = await asyncio.to_thread(self.embedding_service.create_index, documents)
+            if self.index is None:
                 print("No documents found to index.")
                 return False
+            print("Index created successfully!")
         else:
             try:
                 print("Loading existing index...")
@@ -104,17 +130,38 @@ class ChatbotApp:
                 return await self.initialize(force_reindex=True)
         
         # Initialize QA service
-        self.qa_service = QAService(self.index)
+        self.qa_service = QAService(self.index, embedding_service=self.embedding_service)
         return True
     
-    def ask_question(self, question: str, use_cache: bool = True, source_filter: str = "all") -> Dict[str, any]:
+    def ask_question(self, question: str, use_cache: bool = True, source_filter: str = "all",
+                     exact_match: bool = False) -> Dict[str, any]:
         """Ask a question to the chatbot."""
+        return run_sync(self.ask_question_async(question, use_cache, source_filter, exact_match))
+    
+    async def ask_question_async(self, question: str, use_cache: bool = True, source_filter: str = "all",
+                                 exact_match: bool = False) -> Dict[str, any]:
+        """Ask a question to the chatbot without blocking the event loop."""
         if not self.qa_service:
             return {"error": "Chatbot not initialized. Please run initialize() first."}
         
-        response = self.qa_service.answer_question(question, use_cache, source_filter)
+        response = await self.qa_service.answer_question_async(question, use_cache, source_filter, exact_match)
+        await asyncio.to_thread(self._save_chat_history, question, response)
+        return response
+    
+    async def ask_question_stream(self, question: str, use_cache: bool = True, source_filter: str = "all",
+                                  exact_match: bool = False) -> AsyncIterator[Dict[str, any]]:
+        """Stream the answer as QA events, saving chat history once it completes."""
+        if not self.qa_service:
+            yield {"type": "done", "response": {"error": "Chatbot not initialized. Please run initialize() first."}}
+            return
         
-        # Save to chat history
+        async for event in self.qa_service.answer_question_stream(question, use_cache, source_filter, exact_match):
+            if event["type"] == "done":
+                await asyncio.to_thread(self._save_chat_history, question, event["response"])
+            yield event
+    
+    def _save_chat_history(self, question: str, response: Dict[str, any]):
+        """Save a question and its answer to chat history."""
         try:
             db = next(get_db())
             chat_record = ChatHistory(
@@ -126,12 +173,11 @@ class ChatbotApp:
             db.commit()
         except Exception as e:
             print(f"Error saving chat history: {e}")
-        
-        return response
 
 # CLI interface for testing
 async def main():
     app = ChatbotApp()
+    warmup(app.config['embedding'])
     
     # Initialize the app
     success = await app.initialize()
@@ -139,13 +185,16 @@ async def main():
         print("Failed to initialize chatbot.")
         return
     
-    print("\nChatbot ready! Type 'quit' to exit.")
+    print("\nChatbot ready! Type 'stats' for cache and provider statistics, 'quit' to exit.")
     while True:
         question = input("\nYour question: ")
         if question.lower() in ['quit', 'exit']:
             break
+        if question.lower() == 'stats':
+            print(json.dumps(app.qa_service.stats(), indent=2))
+            continue
         
-        response = app.ask_question(question)
+        response = await app.ask_question_async(question)
         if "error" in response:
             print(f"Error: {response['error']}")
         else:
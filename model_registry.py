@@ -0,0 +1,50 @@
+import threading
+from typing import Any, Callable, Dict, Optional
+
+DEFAULT_EMBEDDING_MODEL = 'all-MiniLM-L6-v2'
+
+# Process-wide models, loaded on first use and shared by every service
+_models: Dict[str, Any] = {}
+_lock = threading.Lock()
+
+def get_model(key: str, loader: Callable[[], Any]) -> Any:
+    """Get the model registered under key, calling loader once if it is not loaded yet."""
+    model = _models.get(key)
+    if model is None:
+        with _lock:
+            model = _models.get(key)
+            if model is None:
+                model = loader()
+                _models[key] = model
+    return model
+
+def get_embedding_model(model_name: str = DEFAULT_EMBEDDING_MODEL):
+    """Get the shared SentenceTransformer for model_name."""
+    def load():
+        # Imported here so torch is only loaded when a model is actually needed
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(model_name)
+    
+    return get_model(f"sentence_transformers:{model_name}", load)
+
+def get_cross_encoder(model_name: str):
+    """Get the shared sentence-transformers CrossEncoder for model_name."""
+    def load():
+        from sentence_transformers import CrossEncoder
+        return CrossEncoder(model_name, device='cpu')
+    
+    return get_model(f"cross_encoder:{model_name}", load)
+
+def warmup(embedding_config: Dict[str, Any], background: bool = True) -> Optional[threading.Thread]:
+    """Load the configured embedding backend and run one encode ahead of the first request."""
+    def load():
+        from embedders import get_embedding_backend
+        get_embedding_backend(embedding_config).encode(["warmup"])
+    
+    if not background:
+        load()
+        return None
+    
+    thread = threading.Thread(target=load, name="embedding-warmup", daemon=True)
+    thread.start()
+    return thread
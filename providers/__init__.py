@@ -1,8 +1,36 @@
+import os
+from typing import Any, Dict
 from .openai_provider import OpenAIProvider
 from .groq_provider import GroqProvider
-from .base import BaseLLMProvider
+from .hedged_provider import HedgedProvider
+from .rate_limiter import get_rate_limiter
+from .base import BaseLLMProvider, LLMProviderError
 
 PROVIDERS = {
     "openai": OpenAIProvider,
     "groq": GroqProvider,
-}
\ No newline at end of file
+}
+
+# Environment variables holding each provider's API key and model, and the model used if unset
+PROVIDER_ENV = {
+    "openai": ("OPENAI_API_KEY", "OPENAI_MODEL", "gpt-4o-mini"),
+    "groq": ("GROQ_API_KEY", "GROQ_MODEL", "llama3-8b-8192"),
+}
+
+def create_llm_provider(name: str, llm_config: Dict[str, Any] = None) -> BaseLLMProvider:
+    """Create a registered provider from its API key and model environment variables."""
+    api_key_var, model_var, default_model = PROVIDER_ENV[name]
+    return PROVIDERS[name](
+        api_key=os.getenv(api_key_var),
+        model=os.getenv(model_var) or default_model,
+        rate_limiter=get_rate_limiter(name, llm_config or {})
+    )
+
+def build_llm_provider(llm_config: Dict[str, Any]) -> BaseLLMProvider:
+    """Build the provider chain from config.yaml's llm section, hedging across providers if configured."""
+    providers = [create_llm_provider(name, llm_config) for name in llm_config.get('providers', ['groq'])]
+    # Providers without credentials would only ever fail
+    configured = [provider for provider in providers if provider.validate_config()] or providers[:1]
+    if len(configured) == 1 or not llm_config.get('hedge', {}).get('enabled', True):
+        return configured[0]
+    return HedgedProvider(configured, llm_config.get('hedge', {}))
\ No newline at end of file
@@ -1,18 +1,37 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List, Union
+from typing import Dict, Any, AsyncIterator, List, Optional, Union
+
+class LLMProviderError(Exception):
+    """A provider failed to produce a response."""
+    
+    def __init__(self, message: str, status_code: Optional[int] = None, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
 
 class BaseLLMProvider(ABC):
     """Base class for LLM providers."""
     
-    def __init__(self, api_key: str, model: str):
+    def __init__(self, api_key: str, model: str, rate_limiter=None):
         self.api_key = api_key
         self.model = model
+        # Header-driven scheduling even without configured limits
+        from .rate_limiter import RateLimiter
+        self.rate_limiter = rate_limiter or RateLimiter()
     
     @abstractmethod
     async def generate_response(self, system_prompt: str, user_prompt: str, timeout: int = 30) -> str:
-        """Generate response from the LLM provider."""
+        """Generate response from the LLM provider, raising LLMProviderError on failure."""
         pass
     
+    async def stream_response(self, system_prompt: str, user_prompt: str, timeout: int = 30) -> AsyncIterator[str]:
+        """Stream the response as text deltas; providers without streaming yield it whole."""
+        yield await self.generate_response(system_prompt, user_prompt, timeout)
+    
+    def stats(self) -> List[Dict[str, Any]]:
+        """Per-provider latency and error statistics; empty for providers that do not track them."""
+        return []
+    
     @abstractmethod
     def validate_config(self) -> bool:
         """Validate provider configuration."""
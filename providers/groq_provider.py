@@ -1,13 +1,17 @@
-import requests
-from .base import BaseLLMProvider
+import json
+from typing import AsyncIterator, Dict
+from .base import BaseLLMProvider, LLMProviderError
+from .http_client import get_http_client
+from .rate_limiter import estimate_tokens, parse_duration
+
+GROQ_CHAT_URL = "https://api.groq.com/openai/v1/chat/completions"
+MAX_TOKENS = 800
 
 class GroqProvider(BaseLLMProvider):
     """Groq provider implementation."""
     
-    async def generate_response(self, system_prompt: str, user_prompt: str, timeout: int = 30) -> str:
-        if not self.api_key:
-            return "Error: Groq API key not found"
-        
+    def _request(self, system_prompt: str, user_prompt: str, stream: bool = False) -> Dict:
+        """Headers and JSON body for a chat completion request."""
         headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
@@ -20,23 +24,66 @@ class GroqProvider(BaseLLMProvider):
                 {"role": "user", "content": user_prompt}
             ],
             "temperature": 0.2,
-            "max_tokens": 800
+            "max_tokens": MAX_TOKENS,
+            "stream": stream
         }
+        return {"headers": headers, "json": data}
+    
+    async def _send(self, system_prompt: str, user_prompt: str, timeout: int, stream: bool = False):
+        """Send one request, tracking quota from its headers; rate-limited attempts are retried by the scheduler."""
+        client = get_http_client()
+        request = client.build_request(
+            "POST",
+            GROQ_CHAT_URL,
+            timeout=timeout,
+            **self._request(system_prompt, user_prompt, stream=stream)
+        )
         
-        try:
-            response = requests.post(
-                "https://api.groq.com/openai/v1/chat/completions",
-                headers=headers,
-                json=data,
-                timeout=timeout
-            )
+        async def send():
+            try:
+                response = await client.send(request, stream=stream)
+            except Exception as e:
+                raise LLMProviderError(f"Groq API Error: {str(e)}") from e
             
-            if response.status_code == 200:
-                return response.json()["choices"][0]["message"]["content"]
-            else:
-                return f"Groq API Error: {response.status_code}"
+            self.rate_limiter.update_from_headers(response.headers)
+            if response.status_code != 200:
+                await response.aclose()
+                raise LLMProviderError(
+                    f"Groq API Error: {response.status_code}",
+                    response.status_code,
+                    parse_duration(response.headers.get("retry-after"))
+                )
+            return response
+        
+        return await self.rate_limiter.call(send, estimate_tokens(system_prompt, user_prompt, max_tokens=MAX_TOKENS))
+    
+    async def generate_response(self, system_prompt: str, user_prompt: str, timeout: int = 30) -> str:
+        if not self.api_key:
+            raise LLMProviderError("Groq API key not found")
+        
+        response = await self._send(system_prompt, user_prompt, timeout)
+        return response.json()["choices"][0]["message"]["content"]
+    
+    async def stream_response(self, system_prompt: str, user_prompt: str, timeout: int = 30) -> AsyncIterator[str]:
+        if not self.api_key:
+            raise LLMProviderError("Groq API key not found")
+        
+        response = await self._send(system_prompt, user_prompt, timeout, stream=True)
+        try:
+            # Server-sent events: one "data: {json}" line per delta, then "data: [DONE]"
+            async for line in response.aiter_lines():
+                if not line.startswith("data: "):
+                    continue
+                payload = line[len("data: "):]
+                if payload.strip() == "[DONE]":
+                    break
+                delta = json.loads(payload)["choices"][0]["delta"].get("content")
+                if delta:
+                    yield delta
         except Exception as e:
-            return f"Groq API Error: {str(e)}"
+            raise LLMProviderError(f"Groq API Error: {str(e)}") from e
+        finally:
+            await response.aclose()
     
     def validate_config(self) -> bool:
         return bool(self.api_key)
\ No newline at end of file
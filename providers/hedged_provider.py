@@ -0,0 +1,160 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Dict, List, Optional
+from .base import BaseLLMProvider, LLMProviderError
+
+class LatencyStats:
+    """Sliding window of a provider's recent latencies."""
+    
+    def __init__(self, window: int = 100):
+        self.samples = deque(maxlen=window)
+        self.errors = 0
+        self._lock = threading.Lock()
+    
+    def record(self, seconds: float):
+        with self._lock:
+            self.samples.append(seconds)
+    
+    def record_error(self):
+        with self._lock:
+            self.errors += 1
+    
+    def percentile(self, percentile: float) -> Optional[float]:
+        with self._lock:
+            if not self.samples:
+                return None
+            ordered = sorted(self.samples)
+        return ordered[min(int(len(ordered) * percentile / 100), len(ordered) - 1)]
+
+class HedgedProvider(BaseLLMProvider):
+    """Composite provider that hedges slow requests to the next provider and fails over on errors."""
+    
+    # The first provider is sent every request. If it has not answered within its recent p95
+    # latency, the next provider is sent the same request; the first answer wins and the other
+    # request is cancelled. A provider error starts the next provider at once.
+    
+    def __init__(self, providers: List[BaseLLMProvider], hedge_config: Dict[str, Any] = None):
+        hedge_config = hedge_config or {}
+        # Each wrapped provider schedules its own calls; this one only borrows the first's limiter
+        super().__init__(providers[0].api_key, providers[0].model, providers[0].rate_limiter)
+        self.providers = providers
+        self.percentile = hedge_config.get('percentile', 95)
+        self.initial_delay = hedge_config.get('initial_delay_ms', 2000) / 1000
+        self.min_delay = hedge_config.get('min_delay_ms', 250) / 1000
+        self.max_delay = hedge_config.get('max_delay_ms', 10000) / 1000
+        self.min_samples = hedge_config.get('min_samples', 20)
+        window = hedge_config.get('window', 100)
+        # Full-response and first-token latencies are tracked separately; they drive different hedges
+        self.latency = {
+            kind: [LatencyStats(window) for _ in providers]
+            for kind in ('response', 'first_token')
+        }
+    
+    def hedge_delay(self, index: int, kind: str = 'response') -> float:
+        """Seconds to wait on provider index before hedging to the next one."""
+        stats = self.latency[kind][index]
+        if len(stats.samples) < self.min_samples:
+            return self.initial_delay
+        return min(max(stats.percentile(self.percentile), self.min_delay), self.max_delay)
+    
+    def stats(self) -> List[Dict[str, Any]]:
+        """Latency percentiles and error counts per provider."""
+        return [{
+            "provider": type(provider).__name__,
+            "model": provider.model,
+            "samples": len(self.latency['response'][index].samples),
+            "p50_ms": self._ms(self.latency['response'][index].percentile(50)),
+            "p95_ms": self._ms(self.latency['response'][index].percentile(95)),
+            "first_token_p95_ms": self._ms(self.latency['first_token'][index].percentile(95)),
+            "errors": sum(self.latency[kind][index].errors for kind in self.latency)
+        } for index, provider in enumerate(self.providers)]
+    
+    def _ms(self, seconds: Optional[float]) -> Optional[float]:
+        return round(seconds * 1000, 1) if seconds is not None else None
+    
+    async def _race(self, start, kind: str):
+        """Race start(index) across providers until one succeeds, returning (index, result) of the winner."""
+        tasks: Dict[asyncio.Task, int] = {}
+        started: Dict[int, float] = {}
+        errors = []
+        next_index = 0
+        
+        def launch():
+            nonlocal next_index
+            started[next_index] = time.perf_counter()
+            tasks[asyncio.ensure_future(start(next_index))] = next_index
+            next_index += 1
+        
+        launch()
+        try:
+            while tasks:
+                can_hedge = next_index < len(self.providers)
+                delay = self.hedge_delay(next_index - 1, kind) if can_hedge else None
+                done, _ = await asyncio.wait(tasks, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    launch()  # Hedge: the latest request is slower than usual
+                    continue
+                
+                for task in done:
+                    index = tasks.pop(task)
+                    try:
+                        result = task.result()
+                    except LLMProviderError as e:
+                        self.latency[kind][index].record_error()
+                        errors.append(e)
+                        continue
+                    self.latency[kind][index].record(time.perf_counter() - started[index])
+                    return index, result
+                
+                # Fail over: start the next provider as soon as one errors
+                if next_index < len(self.providers):
+                    launch()
+        finally:
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        
+        raise LLMProviderError("All LLM providers failed: " + "; ".join(str(e) for e in errors))
+    
+    async def generate_response(self, system_prompt: str, user_prompt: str, timeout: int = 30) -> str:
+        _, response = await self._race(
+            lambda index: self.providers[index].generate_response(system_prompt, user_prompt, timeout),
+            'response'
+        )
+        return response
+    
+    async def stream_response(self, system_prompt: str, user_prompt: str, timeout: int = 30) -> AsyncIterator[str]:
+        # Providers race to their first delta; the winner's stream is then passed through
+        streams = {}
+        
+        async def first_delta(index: int):
+            streams[index] = self.providers[index].stream_response(system_prompt, user_prompt, timeout)
+            try:
+                return await streams[index].__anext__()
+            except StopAsyncIteration:
+                return None
+        
+        winner = None
+        try:
+            winner, delta = await self._race(first_delta, 'first_token')
+        finally:
+            # Close the losers' streams (and their connections)
+            for index, stream in streams.items():
+                if index != winner:
+                    await stream.aclose()
+        
+        try:
+            if delta is None:
+                return
+            yield delta
+            async for delta in streams[winner]:
+                yield delta
+        finally:
+            # The consumer may stop early; close the winner's stream now rather than when it is garbage collected
+            await streams[winner].aclose()
+    
+    def validate_config(self) -> bool:
+        return any(provider.validate_config() for provider in self.providers)
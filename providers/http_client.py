@@ -0,0 +1,41 @@
+import asyncio
+import os
+import threading
+import weakref
+import httpx
+
+# One pooled client per event loop; an httpx.AsyncClient cannot be shared across loops
+_clients = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+def _create_client() -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", 100)),
+        max_keepalive_connections=int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", 20)),
+        keepalive_expiry=float(os.getenv("LLM_KEEPALIVE_EXPIRY", 60))
+    )
+    http2 = os.getenv("LLM_HTTP2", "false").lower() == "true"
+    try:
+        return httpx.AsyncClient(http2=http2, limits=limits, timeout=30)
+    except ImportError:
+        # HTTP/2 needs the h2 package (pip install httpx[http2])
+        print("LLM_HTTP2 is set but h2 is not installed; using HTTP/1.1")
+        return httpx.AsyncClient(limits=limits, timeout=30)
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get the keep-alive HTTP client shared by every provider on the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        with _lock:
+            client = _clients.get(loop)
+            if client is None or client.is_closed:
+                client = _create_client()
+                _clients[loop] = client
+    return client
+
+async def close_http_client():
+    """Close the running loop's shared client, e.g. before the loop shuts down."""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
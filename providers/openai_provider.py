@@ -1,28 +1,81 @@
+import asyncio
+import weakref
+from typing import AsyncIterator
 import openai
-from .base import BaseLLMProvider
+from .base import BaseLLMProvider, LLMProviderError
+from .http_client import get_http_client
+from .rate_limiter import estimate_tokens, parse_duration
+
+MAX_TOKENS = 800
 
 class OpenAIProvider(BaseLLMProvider):
     """OpenAI provider implementation."""
     
+    def __init__(self, api_key: str, model: str, rate_limiter=None):
+        super().__init__(api_key, model, rate_limiter)
+        self._clients = weakref.WeakKeyDictionary()
+    
+    def _client(self) -> openai.AsyncOpenAI:
+        """AsyncOpenAI client for the running loop, on the shared connection pool."""
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            # Retries are left to the rate limiter, which also tracks quota across requests
+            client = openai.AsyncOpenAI(api_key=self.api_key, http_client=get_http_client(), max_retries=0)
+            self._clients[loop] = client
+        return client
+    
+    async def _create(self, system_prompt: str, user_prompt: str, timeout: int, stream: bool = False):
+        """Create a chat completion through the rate limiter, tracking quota from the response headers."""
+        async def send():
+            try:
+                raw = await self._client().chat.completions.with_raw_response.create(
+                    model=self.model,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt}
+                    ],
+                    temperature=0.2,
+                    max_tokens=MAX_TOKENS,
+                    timeout=timeout,
+                    stream=stream
+                )
+            except Exception as e:
+                response = getattr(e, 'response', None)
+                headers = response.headers if response is not None else {}
+                self.rate_limiter.update_from_headers(headers)
+                raise LLMProviderError(
+                    f"OpenAI API Error: {str(e)}",
+                    getattr(e, 'status_code', None),
+                    parse_duration(headers.get('retry-after'))
+                ) from e
+            
+            self.rate_limiter.update_from_headers(raw.headers)
+            return raw.parse()
+        
+        return await self.rate_limiter.call(send, estimate_tokens(system_prompt, user_prompt, max_tokens=MAX_TOKENS))
+    
     async def generate_response(self, system_prompt: str, user_prompt: str, timeout: int = 30) -> str:
         if not self.api_key:
-            return "Error: OpenAI API key not found"
+            raise LLMProviderError("OpenAI API key not found")
         
-        client = openai.OpenAI(api_key=self.api_key, timeout=timeout)
+        response = await self._create(system_prompt, user_prompt, timeout)
+        return response.choices[0].message.content
+    
+    async def stream_response(self, system_prompt: str, user_prompt: str, timeout: int = 30) -> AsyncIterator[str]:
+        if not self.api_key:
+            raise LLMProviderError("OpenAI API key not found")
         
+        stream = await self._create(system_prompt, user_prompt, timeout, stream=True)
         try:
-            response = client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.2,
-                max_tokens=800
-            )
-            return response.choices[0].message.content
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
         except Exception as e:
-            return f"OpenAI API Error: {str(e)}"
+            raise LLMProviderError(f"OpenAI API Error: {str(e)}", getattr(e, 'status_code', None)) from e
+        finally:
+            # Also runs when the consumer stops early (or a hedge loser is closed), returning the connection to the pool
+            await stream.close()
     
     def validate_config(self) -> bool:
         return bool(self.api_key)
\ No newline at end of file
@@ -0,0 +1,193 @@
+import asyncio
+import itertools
+import random
+import re
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Mapping, Optional
+from .base import LLMProviderError
+
+# Statuses worth retrying after a backoff
+RETRYABLE_STATUS = {429, 503}
+
+DURATION_PART = re.compile(r'(\d+(?:\.\d+)?)(ms|h|m|s)')
+DURATION_SECONDS = {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600}
+
+# Quota windows a provider's x-ratelimit-* headers may report
+WINDOW_SECONDS = {'minute': 60, 'day': 86400}
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Seconds in a rate limit header value like '7.66s', '2m59.56s' or '120ms'."""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        parts = DURATION_PART.findall(value)
+        return sum(float(amount) * DURATION_SECONDS[unit] for amount, unit in parts) if parts else None
+
+def estimate_tokens(*texts: str, max_tokens: int = 0) -> int:
+    """Rough token cost of a request: about four characters per prompt token plus the completion budget."""
+    return sum(len(text) for text in texts) // 4 + max_tokens
+
+class TokenBucket:
+    """Bucket of limit per window seconds, refilling continuously; an unset limit means unlimited until headers say otherwise."""
+    
+    def __init__(self, limit: Optional[float] = None, window: float = 60):
+        self.window = window
+        # Headers may lower the configured quota but never raise it
+        self.max_capacity = limit
+        self.capacity = limit
+        self.level = limit
+        self.rate = limit / window if limit else None
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+    
+    def _refill(self, now: float):
+        if self.capacity is not None:
+            self.level = min(self.capacity, self.level + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+    
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until amount can be taken."""
+        self._refill(now)
+        wait = max(self.paused_until - now, 0.0)
+        if self.capacity is None:
+            return wait
+        shortfall = min(amount, self.capacity) - self.level
+        return max(wait, shortfall / self.rate if shortfall > 0 else 0.0)
+    
+    def take(self, amount: float):
+        if self.capacity is not None:
+            self.level -= min(amount, self.capacity)
+    
+    def observe(self, limit: Optional[float], remaining: Optional[float], reset: Optional[float], now: float):
+        """Adopt the quota reported by the provider."""
+        self._refill(now)
+        if limit:
+            if self.max_capacity is not None:
+                limit = min(limit, self.max_capacity)
+            if self.capacity is None:
+                self.level = limit
+            self.capacity = limit
+            self.rate = limit / self.window
+        if remaining is not None and self.capacity is not None:
+            self.level = min(remaining, self.capacity)
+            # The provider reports when the quota is back to full, which fixes the actual refill rate
+            if reset and remaining < self.capacity:
+                self.rate = (self.capacity - remaining) / reset
+
+class RateLimiter:
+    """Schedules a provider's outbound calls against its requests- and tokens-per-minute quota."""
+    
+    # Waiting calls are served in arrival order. Quota is tracked from the x-ratelimit-* and
+    # retry-after response headers; 429s are retried with jittered backoff, and calls that
+    # cannot be served within max_wait_s are rejected so hedging can fail them over.
+    
+    def __init__(self, limits_config: Dict[str, Any] = None):
+        limits_config = limits_config or {}
+        self.requests = TokenBucket(limits_config.get('requests_per_minute'))
+        self.tokens = TokenBucket(limits_config.get('tokens_per_minute'))
+        # Headers reporting a longer window (Groq's requests limit is per day) feed a bucket of their own
+        header_windows = limits_config.get('header_windows', {})
+        self.header_buckets = {}
+        for kind, bucket in (('requests', self.requests), ('tokens', self.tokens)):
+            window = WINDOW_SECONDS[header_windows.get(kind, 'minute')]
+            self.header_buckets[kind] = bucket if window == bucket.window else TokenBucket(window=window)
+        self.max_queue = limits_config.get('max_queue', 100)
+        self.max_wait = limits_config.get('max_wait_s', 20)
+        self.max_retries = limits_config.get('max_retries', 3)
+        self.backoff_base = limits_config.get('backoff_base_s', 0.5)
+        self.backoff_max = limits_config.get('backoff_max_s', 8)
+        self.poll_interval = 0.05
+        self._queue = []
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+    
+    def update_from_headers(self, headers: Mapping[str, str]):
+        """Track remaining quota from a response's rate limit headers."""
+        now = time.monotonic()
+        with self._lock:
+            for kind, bucket in self.header_buckets.items():
+                limit = headers.get(f'x-ratelimit-limit-{kind}')
+                remaining = headers.get(f'x-ratelimit-remaining-{kind}')
+                bucket.observe(
+                    float(limit) if limit else None,
+                    float(remaining) if remaining else None,
+                    parse_duration(headers.get(f'x-ratelimit-reset-{kind}')),
+                    now
+                )
+            retry_after = parse_duration(headers.get('retry-after'))
+            if retry_after:
+                self.requests.paused_until = max(self.requests.paused_until, now + retry_after)
+    
+    def _charges(self, tokens: int):
+        """Every bucket one request of about tokens tokens draws on, with the amount it takes."""
+        charges = [(self.requests, 1), (self.tokens, tokens)]
+        for kind, bucket in self.header_buckets.items():
+            if bucket is not self.requests and bucket is not self.tokens:
+                charges.append((bucket, 1 if kind == 'requests' else tokens))
+        return charges
+    
+    async def acquire(self, tokens: int = 0):
+        """Wait for quota for one request of about tokens tokens, in arrival order."""
+        with self._lock:
+            # Backpressure: reject rather than let the queue grow without bound
+            if len(self._queue) >= self.max_queue:
+                raise LLMProviderError("LLM rate limit queue is full", 429)
+            entry = next(self._sequence)
+            self._queue.append(entry)
+        
+        deadline = time.monotonic() + self.max_wait
+        try:
+            while True:
+                now = time.monotonic()
+                with self._lock:
+                    wait = self.poll_interval
+                    if self._queue[0] == entry:
+                        charges = self._charges(tokens)
+                        wait = max(bucket.wait_time(amount, now) for bucket, amount in charges)
+                        if wait <= 0:
+                            for bucket, amount in charges:
+                                bucket.take(amount)
+                            return
+                if now + wait > deadline:
+                    raise LLMProviderError(f"LLM rate limit wait would exceed {self.max_wait}s", 429)
+                await asyncio.sleep(min(wait, 1.0))
+        finally:
+            with self._lock:
+                if entry in self._queue:
+                    self._queue.remove(entry)
+    
+    async def call(self, send: Callable[[], Awaitable[Any]], tokens: int = 0) -> Any:
+        """Run send() when quota allows, retrying rate-limited attempts with jittered backoff."""
+        for attempt in range(self.max_retries + 1):
+            await self.acquire(tokens)
+            try:
+                return await send()
+            except LLMProviderError as e:
+                if e.status_code not in RETRYABLE_STATUS or attempt == self.max_retries:
+                    raise
+                if e.retry_after:
+                    delay = e.retry_after + random.uniform(0, self.backoff_base)
+                else:
+                    delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                await asyncio.sleep(delay)
+
+# Process-wide limiters by provider name
+_limiters: Dict[str, RateLimiter] = {}
+_lock = threading.Lock()
+
+def get_rate_limiter(name: str, llm_config: Dict[str, Any]) -> RateLimiter:
+    """Process-wide limiter for a provider, so every QA instance draws on the same quota."""
+    limits_config = {
+        **llm_config.get('scheduler', {}),
+        **llm_config.get('rate_limits', {}).get(name, {})
+    }
+    limiter = _limiters.get(name)
+    if limiter is None:
+        with _lock:
+            limiter = _limiters.get(name)
+            if limiter is None:
+                limiter = _limiters[name] = RateLimiter(limits_config)
+    return limiter
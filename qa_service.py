@@ -1,101 +1,225 @@
-import os
+import time
+import asyncio
 import yaml
-from typing import List, Dict, Optional
+from typing import AsyncIterator, List, Dict, Optional
 from llama_index.core import VectorStoreIndex
 from llama_index.core.retrievers import VectorIndexRetriever
-from cache_utils import get_cached_response, cache_response
+from cache_utils import generate_cache_key, get_cache_stats, get_cached_response
+from semantic_cache import get_semantic_cache
+from single_flight import get_single_flight
+from retrieval_filters import build_metadata_filters, build_where
+from bm25_index import get_bm25_index
+from hybrid_search import hybrid_search, score_cutoff
+from reranker import get_reranker
+from context_packer import get_context_packer
+from async_runtime import run_sync
+from providers import build_llm_provider, LLMProviderError
 
 class QAService:
-    def __init__(self, index: VectorStoreIndex, config_path: str = "config.yaml"):
+    def __init__(self, index: VectorStoreIndex, config_path: str = "config.yaml", embedding_service=None):
         with open(config_path, 'r') as f:
             self.config = yaml.safe_load(f)
         
         self.index = index
         
-        # Initialize Groq LLM
-        from providers.groq_provider import GroqProvider
-        self.llm_provider = GroqProvider(
-            api_key=os.getenv('GROQ_API_KEY'),
-            model=os.getenv('GROQ_MODEL')
-        )
+        # Embeds questions for the similar-question response cache, which is exact-match only without it
+        self.embedding_service = embedding_service
+        self.response_cache = get_semantic_cache(self.config)
+        self.single_flight = get_single_flight(self.config)
+        
+        # Initialize Groq LLM, hedged to and failed over to the other configured providers
+        self.llm_provider = build_llm_provider(self.config['llm'])
         
-        # Create retriever
-        self.retriever = VectorIndexRetriever(
+        # Lexical index over the same chunks, for hybrid retrieval
+        self.bm25_index = get_bm25_index(self.config)
+        self.reranker = get_reranker(self.config['retrieval'])
+        self.context_packer = get_context_packer(self.config)
+        
+        # Note: Using simple retrieval without LlamaIndex query engine
+        # Will generate answers using the LLM provider directly
+    
+    def _dense_search(self, question: str, n_results: int, filters=None) -> List[Dict]:
+        """Retrieve the n_results nearest nodes as plain result dicts."""
+        retriever = VectorIndexRetriever(
             index=self.index,
-            similarity_top_k=self.config['retrieval']['top_k']
+            similarity_top_k=n_results,
+            filters=filters
+        )
+        return [{
+            "id": node.node_id,
+            "content": node.text,
+            "metadata": node.metadata,
+            "score": node.score
+        } for node in retriever.retrieve(question)]
+    
+    def stats(self) -> Dict[str, any]:
+        """Cache hit rates and LLM provider latencies, for monitoring."""
+        return {
+            "response_cache": self.response_cache.stats(),
+            "local_caches": get_cache_stats(),
+            "providers": self.llm_provider.stats()
+        }
+    
+    def answer_question(self, question: str, use_cache: bool = True, source_filter: str = "all",
+                        exact_match: bool = False) -> Dict[str, any]:
+        """Answer question using RAG, blocking until the answer is ready."""
+        return run_sync(self.answer_question_async(question, use_cache, source_filter, exact_match))
+    
+    def _retrieve(self, question: str, source_filter: str) -> List[Dict]:
+        """Retrieve relevant documents of the selected source types, fusing dense and BM25 rankings."""
+        filters = build_metadata_filters(source_filter)
+        results = hybrid_search(
+            question,
+            lambda n_results: self._dense_search(question, n_results, filters),
+            self.bm25_index,
+            self.config['retrieval'],
+            n_results=self.reranker.candidates if self.reranker else self.config['retrieval']['top_k'],
+            where=build_where(source_filter)
         )
         
-        # Note: Using simple retrieval without LlamaIndex query engine
-        # Will generate answers using Groq provider directly
+        # Irrelevant chunks only slow the LLM down; with none left the question is answered without it
+        results = score_cutoff(results, self.config['retrieval'])
+        
+        # Over-fetched candidates are cut down to the few best by the cross-encoder
+        if self.reranker:
+            results = self.reranker.rerank(question, results)
+        return results
     
-    def answer_question(self, question: str, use_cache: bool = True, source_filter: str = "all") -> Dict[str, any]:
-        """Answer question using RAG with optional caching."""
+    async def answer_question_async(self, question: str, use_cache: bool = True, source_filter: str = "all",
+                                    exact_match: bool = False) -> Dict[str, any]:
+        """Answer question using RAG with optional caching; exact_match disables the similar-question cache."""
+        async for event in self.answer_question_stream(question, use_cache, source_filter, exact_match):
+            if event["type"] == "done":
+                return event["response"]
+    
+    async def answer_question_stream(self, question: str, use_cache: bool = True, source_filter: str = "all",
+                                     exact_match: bool = False) -> AsyncIterator[Dict[str, any]]:
+        """Stream the answer as {"type": "delta", "text"} events, then one {"type": "done", "response"} event."""
+        start_time = time.perf_counter()
+        embed_question = None
+        if self.embedding_service:
+            embed_question = lambda: self.embedding_service.get_embedding_with_cache(question)
         
-        # Check cache if enabled
+        # Check cache if enabled; Redis, embedding and retrieval calls block, so they run off the event loop
         if use_cache:
-            cached_response = get_cached_response(
+            cached = await asyncio.to_thread(
+                self.response_cache.get,
                 question, 
                 {"source_filter": source_filter}, 
-                self.config['llm']['model']
+                self.config['llm']['model'],
+                embed_question,
+                exact_match
             )
-            if cached_response:
-                return {
-                    "answer": cached_response,
-                    "sources": [],
-                    "cached": True
-                }
-        
-        # Retrieve relevant documents
-        retrieved_nodes = self.retriever.retrieve(question)
-        
-        # Filter sources if specified
-        if source_filter != "all":
-            filtered_nodes = []
-            for node in retrieved_nodes:
-                node_type = node.metadata.get('type', '')
-                if source_filter == "docs" and node_type in ['document', 'pdf']:
-                    filtered_nodes.append(node)
-                elif source_filter == "web" and node_type == 'web':
-                    filtered_nodes.append(node)
-            retrieved_nodes = filtered_nodes
-        
-        if not retrieved_nodes:
-            return {
-                "answer": "I couldn't find relevant information to answer your question.",
+            if cached:
+                yield {"type": "delta", "text": cached['response']['answer']}
+                yield {"type": "done", "response": {
+                    **cached['response'],
+                    "cached": True,
+                    "cache_similarity": cached['similarity']
+                }}
+                return
+        
+        # Identical questions already in flight are answered once; followers get the leader's response
+        flight = None
+        if use_cache:
+            flight = await self.single_flight.join(
+                generate_cache_key(question, {"source_filter": source_filter}, self.config['llm']['model']),
+                lambda: get_cached_response(question, {"source_filter": source_filter}, self.config['llm']['model'])
+            )
+            if flight.result is not None:
+                yield {"type": "delta", "text": flight.result['answer']}
+                yield {"type": "done", "response": {
+                    **flight.result,
+                    "cached": True,
+                    "coalesced": True
+                }}
+                return
+        
+        try:
+            async for event in self._generate_stream(question, use_cache, source_filter, start_time, embed_question):
+                if event["type"] == "done" and flight:
+                    # An error answer is not a result to share; followers answer for themselves
+                    flight.complete(None if event.get("failed") else event["response"])
+                yield event
+        finally:
+            # Followers of an abandoned or failed leader fall back to answering for themselves
+            if flight:
+                flight.complete(None)
+    
+    async def _generate_stream(self, question: str, use_cache: bool, source_filter: str, start_time: float,
+                               embed_question) -> AsyncIterator[Dict[str, any]]:
+        """Retrieve, generate and cache an answer, streaming QA events."""
+        results = await asyncio.to_thread(self._retrieve, question, source_filter)
+        
+        if not results:
+            answer = "I couldn't find relevant information to answer your question."
+            yield {"type": "delta", "text": answer}
+            yield {"type": "done", "response": {
+                "answer": answer,
                 "sources": [],
-                "cached": False
-            }
+                "cached": False,
+                "timing": {"total_ms": round((time.perf_counter() - start_time) * 1000, 1)}
+            }}
+            return
+        
+        retrieval_time = time.perf_counter()
         
-        # Generate answer using Groq
-        context = "\n\n".join([node.text for node in retrieved_nodes[:3]])
+        # Generate answer from the best distinct chunks that fit the prompt budget, passing tokens on as they arrive
         system_prompt = "You are a helpful assistant. Answer the question based on the provided context."
+        context, packed = self.context_packer.pack(results, self.context_packer.budget(system_prompt, question))
         user_prompt = f"Context: {context}\n\nQuestion: {question}"
         
-        import asyncio
-        answer = asyncio.run(self.llm_provider.generate_response(system_prompt, user_prompt))
+        deltas = []
+        first_token_time = None
+        failed = False
+        try:
+            async for delta in self.llm_provider.stream_response(system_prompt, user_prompt):
+                first_token_time = first_token_time or time.perf_counter()
+                deltas.append(delta)
+                yield {"type": "delta", "text": delta}
+        except LLMProviderError as e:
+            failed = True
+            delta = f"Error generating response: {str(e)}"
+            deltas.append(delta)
+            yield {"type": "delta", "text": delta}
+        answer = "".join(deltas)
         
-        # Extract sources
+        generation_time = time.perf_counter()
+        
+        # Extract sources: only the chunks the answer was actually given
         sources = []
-        for node in retrieved_nodes:
+        for result in packed:
             sources.append({
-                "filename": node.metadata.get('filename', 'Unknown'),
-                "source": node.metadata.get('source', 'Unknown'),
-                "type": node.metadata.get('type', 'Unknown'),
-                "content_preview": node.text[:200] + "..." if len(node.text) > 200 else node.text
+                "filename": result['metadata'].get('filename', 'Unknown'),
+                "source": result['metadata'].get('source', 'Unknown'),
+                "type": result['metadata'].get('type', 'Unknown'),
+                "content_preview": result['content'][:200] + "..." if len(result['content']) > 200 else result['content']
             })
         
-        # Cache the response
-        if use_cache:
-            cache_response(
+        response = {
+            "answer": answer,
+            "sources": sources,
+            "timing": {
+                "retrieval_ms": round((retrieval_time - start_time) * 1000, 1),
+                "first_token_ms": round(((first_token_time or generation_time) - start_time) * 1000, 1),
+                "generation_ms": round((generation_time - retrieval_time) * 1000, 1),
+                "total_ms": round((time.perf_counter() - start_time) * 1000, 1)
+            }
+        }
+        
+        # Cache the full response once the stream completes, so cache hits keep their sources;
+        # error answers are not cached
+        if use_cache and not failed:
+            await asyncio.to_thread(
+                self.response_cache.put,
                 question,
                 {"source_filter": source_filter},
                 self.config['llm']['model'],
-                answer,
-                ttl=int(os.getenv('RESPONSE_CACHE_TTL', 3600))
+                response,
+                embed_question
             )
         
-        return {
-            "answer": answer,
-            "sources": sources,
+        yield {"type": "done", "failed": failed, "response": {
+            **response,
             "cached": False
-        }
\ No newline at end of file
+        }}
\ No newline at end of file
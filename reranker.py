@@ -0,0 +1,80 @@
+import time
+from typing import Any, Dict, List, Optional
+from cache_utils import cache_rerank_scores, get_cached_rerank_scores
+from model_registry import get_cross_encoder
+
+DEFAULT_RERANK_MODEL = 'cross-encoder/ms-marco-MiniLM-L-6-v2'
+
+class CrossEncoderReranker:
+    """Rescore retrieved chunks against the query with a small CPU cross-encoder."""
+    
+    def __init__(self, rerank_config: Dict[str, Any]):
+        self.model_name = rerank_config.get('model', DEFAULT_RERANK_MODEL)
+        self.candidates = rerank_config.get('candidates', 30)
+        self.top_n = rerank_config.get('top_n', 3)
+        self.batch_size = rerank_config.get('batch_size', 32)
+        self.budget_ms = rerank_config.get('budget_ms', 150)
+        self.max_chars = rerank_config.get('max_chars', 2000)
+        self.cache_ttl = rerank_config.get('cache_ttl', 86400)
+        self.pair_ms = None  # Measured milliseconds per scored pair, smoothed across calls
+    
+    @property
+    def model(self):
+        """Shared cross-encoder, loaded on first use."""
+        return get_cross_encoder(self.model_name)
+    
+    def rerank(self, query: str, results: List[Dict], top_n: int = None) -> List[Dict]:
+        """Order results by cross-encoder score and keep the best top_n."""
+        top_n = top_n or self.top_n
+        if len(results) <= 1:
+            return results[:top_n]
+        
+        start_time = time.perf_counter()
+        scores = get_cached_rerank_scores(query, self.model_name, [result['id'] for result in results])
+        missing = [result for result in results if result['id'] not in scores]
+        
+        # Score the most promising candidates first, sizing each pass from the measured per-pair latency so
+        # it fits in what is left of the budget; a cold model load counts against the budget too
+        new_scores = {}
+        while len(new_scores) < len(missing):
+            model = self.model
+            remaining_ms = self.budget_ms - (time.perf_counter() - start_time) * 1000
+            # Until latency has been measured, a small probe pass bounds the overrun
+            size = min(self.batch_size, 4) if self.pair_ms is None else min(self.batch_size, int(remaining_ms / self.pair_ms))
+            if remaining_ms <= 0 or size < 1:
+                print(f"Rerank budget of {self.budget_ms}ms spent after {len(new_scores)} of {len(missing)} new candidates")
+                break
+            batch = missing[len(new_scores):len(new_scores) + size]
+            pass_start = time.perf_counter()
+            batch_scores = model.predict(
+                [(query, result['content'][:self.max_chars]) for result in batch],
+                batch_size=len(batch)
+            )
+            pair_ms = (time.perf_counter() - pass_start) * 1000 / len(batch)
+            self.pair_ms = pair_ms if self.pair_ms is None else 0.8 * self.pair_ms + 0.2 * pair_ms
+            for result, score in zip(batch, batch_scores):
+                new_scores[result['id']] = float(score)
+        
+        if new_scores:
+            cache_rerank_scores(query, self.model_name, new_scores, ttl=self.cache_ttl)
+            scores.update(new_scores)
+        
+        scored = sorted(
+            (result for result in results if result['id'] in scores),
+            key=lambda result: scores[result['id']],
+            reverse=True
+        )
+        reranked = [{**result, 'rerank_score': scores[result['id']]} for result in scored]
+        # Unscored candidates keep their retrieval order behind the scored ones, with rerank scores below all
+        # of them so the context packer's ordering agrees (their rrf_score is on a different scale)
+        floor = min(scores.values()) if scores else None
+        for i, result in enumerate(result for result in results if result['id'] not in scores):
+            reranked.append({**result, 'rerank_score': floor - 1.0 - i if floor is not None else None})
+        return reranked[:top_n]
+
+def get_reranker(retrieval_config: Dict[str, Any]) -> Optional[CrossEncoderReranker]:
+    """Reranker for config.yaml's retrieval.rerank section, or None if reranking is disabled."""
+    rerank_config = retrieval_config.get('rerank', {})
+    if not rerank_config.get('enabled', False):
+        return None
+    return CrossEncoderReranker(rerank_config)
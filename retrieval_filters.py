@@ -0,0 +1,65 @@
+from typing import Any, Dict, List, Optional
+
+# Document types covered by each source filter
+SOURCE_FILTERS = {
+    "all": None,
+    "docs": ["document", "pdf"],
+    "web": ["web"],
+    "business_knowledge": ["business_knowledge"],
+    "azure_wiki": ["azure_wiki"],
+    "sharepoint": ["sharepoint", "sharepoint_export"],
+    "wiki": ["wiki"],
+}
+
+def source_filter_types(source_filter: str) -> Optional[List[str]]:
+    """Document types matched by source_filter, or None for no filtering."""
+    if source_filter in SOURCE_FILTERS:
+        return SOURCE_FILTERS[source_filter]
+    # Any other value is taken as a single document type
+    return [source_filter]
+
+def build_where(source_filter: str) -> Optional[Dict[str, Any]]:
+    """Translate source_filter into a vector store where clause."""
+    types = source_filter_types(source_filter)
+    return {"type": {"$in": types}} if types else None
+
+def build_metadata_filters(source_filter: str):
+    """Translate source_filter into LlamaIndex MetadataFilters."""
+    from llama_index.core.vector_stores.types import FilterOperator, MetadataFilter, MetadataFilters
+    
+    types = source_filter_types(source_filter)
+    if not types:
+        return None
+    return MetadataFilters(filters=[MetadataFilter(key="type", value=types, operator=FilterOperator.IN)])
+
+COMPARISONS = {
+    '$eq': lambda value, target: value == target,
+    '$ne': lambda value, target: value != target,
+    '$gt': lambda value, target: value is not None and value > target,
+    '$gte': lambda value, target: value is not None and value >= target,
+    '$lt': lambda value, target: value is not None and value < target,
+    '$lte': lambda value, target: value is not None and value <= target,
+    '$in': lambda value, target: value in target,
+    '$nin': lambda value, target: value not in target,
+}
+
+def matches_where(metadata: Dict[str, Any], where: Optional[Dict[str, Any]]) -> bool:
+    """Evaluate a Chroma-style where clause against one chunk's metadata."""
+    if not where:
+        return True
+    for key, condition in where.items():
+        if key == '$and':
+            if not all(matches_where(metadata, sub_where) for sub_where in condition):
+                return False
+            continue
+        if key == '$or':
+            if not any(matches_where(metadata, sub_where) for sub_where in condition):
+                return False
+            continue
+        
+        if not isinstance(condition, dict):
+            condition = {'$eq': condition}
+        value = metadata.get(key)
+        if not all(COMPARISONS[operator](value, target) for operator, target in condition.items()):
+            return False
+    return True
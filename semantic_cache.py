@@ -0,0 +1,218 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+from cache_utils import (
+    redis_binary_client, generate_cache_key, get_cached_response, get_cached_response_by_key,
+    cache_response, encode_embedding, decode_embedding, get_index_generation
+)
+from embedders import embedding_model_key
+
+class SemanticCache:
+    """LLM response cache that also matches questions phrased differently from a cached one."""
+    
+    # Answers live in the exact-match response cache. Each scope (index generation, embedding model,
+    # LLM and context data such as source_filter) keeps a Redis hash from response cache key to the
+    # packed question embedding, mirrored in process for the nearest-neighbour lookup, plus a sorted
+    # set of last-use times that caps the scope at max_entries by evicting the least recently used.
+    
+    def __init__(self, semantic_config: Dict[str, Any], embedding_model: str):
+        self.enabled = semantic_config.get('enabled', True)
+        self.threshold = semantic_config.get('similarity_threshold', 0.92)
+        self.refresh_seconds = semantic_config.get('refresh_seconds', 30)
+        self.max_entries = semantic_config.get('max_entries', 10000)
+        self.max_scopes = semantic_config.get('max_scopes', 64)
+        self.scope_ttl = semantic_config.get('scope_ttl', 604800)
+        self.embedding_model = embedding_model
+        self._scopes: OrderedDict = OrderedDict()  # Least recently used first
+        self._lock = threading.Lock()
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+    
+    def get(self, question: str, context_data: Any, model: str, embed: Optional[Callable[[], List[float]]],
+            exact_match: bool = False) -> Optional[Dict[str, Any]]:
+        """Get {'response', 'similarity'} for question, or None; embed is only called on an exact miss."""
+        response = get_cached_response(question, context_data, model)
+        if response is not None:
+            self._record('exact_hits')
+            return {'response': response, 'similarity': 1.0}
+        if exact_match or not self.enabled or embed is None:
+            self._record('misses')
+            return None
+        
+        scope_key = self._scope_key(context_data, model)
+        scope = self._load_scope(scope_key)
+        with self._lock:
+            keys, matrix = list(scope['keys']), scope['matrix'][:len(scope['keys'])].copy()
+        if not keys:
+            self._record('misses')
+            return None
+        
+        import numpy as np
+        query = np.asarray(embed(), dtype=np.float32)
+        similarities = matrix @ (query / (np.linalg.norm(query) or 1.0))
+        for index in np.argsort(-similarities):
+            if similarities[index] < self.threshold:
+                break
+            response = get_cached_response_by_key(keys[index])
+            if response is not None:
+                self._record('semantic_hits')
+                self._touch(scope_key, keys[index])
+                return {'response': response, 'similarity': float(similarities[index])}
+            # The answer expired; drop its question from the scope
+            self._forget(scope_key, [keys[index]])
+        
+        self._record('misses')
+        return None
+    
+    def put(self, question: str, context_data: Any, model: str, response: Dict[str, Any],
+            embed: Optional[Callable[[], List[float]]], ttl: int = None):
+        """Cache the response payload for question and index the question's embedding for similar lookups."""
+        cache_response(question, context_data, model, response, ttl=ttl)
+        if not self.enabled or embed is None:
+            return
+        
+        cache_key = generate_cache_key(question, context_data, model)
+        scope_key = self._scope_key(context_data, model)
+        embedding = embed()
+        try:
+            pipe = redis_binary_client.pipeline(transaction=False)
+            pipe.hset(scope_key, cache_key, encode_embedding(embedding))
+            pipe.zadd(f"{scope_key}:lru", {cache_key: time.time()})
+            # Scopes of earlier index generations are never written again and expire
+            pipe.expire(scope_key, self.scope_ttl)
+            pipe.expire(f"{scope_key}:lru", self.scope_ttl)
+            pipe.zcard(f"{scope_key}:lru")
+            size = pipe.execute()[-1]
+            evicted = []
+            if size > self.max_entries:
+                evicted = [key.decode() for key, _ in redis_binary_client.zpopmin(f"{scope_key}:lru", size - self.max_entries)]
+                redis_binary_client.hdel(scope_key, *evicted)
+        except Exception:
+            return
+        
+        with self._lock:
+            scope = self._scopes.get(scope_key)
+            if scope is not None:
+                self._append(scope, cache_key, embedding)
+        if evicted:
+            self._forget(scope_key, evicted, in_redis=False)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit counters and the overall hit rate."""
+        with self._lock:
+            lookups = self.exact_hits + self.semantic_hits + self.misses
+            return {
+                "exact_hits": self.exact_hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "hit_rate": (self.exact_hits + self.semantic_hits) / lookups if lookups else 0.0
+            }
+    
+    def _record(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+    
+    def _scope_key(self, context_data: Any, model: str) -> str:
+        # Questions embedded by another model (or with another dimension) are not comparable
+        scope = f"{json.dumps(context_data, sort_keys=True)}:{model}:{self.embedding_model}"
+        return f"semantic_cache:g{get_index_generation()}:{hashlib.md5(scope.encode()).hexdigest()}"
+    
+    def _load_scope(self, scope_key: str) -> Dict[str, Any]:
+        """Get the in-process mirror of a scope, re-reading it from Redis when it is stale."""
+        with self._lock:
+            scope = self._scopes.get(scope_key)
+            if scope is not None and time.monotonic() - scope['loaded_at'] < self.refresh_seconds:
+                self._scopes.move_to_end(scope_key)
+                return scope
+        
+        try:
+            entries = redis_binary_client.hgetall(scope_key)
+        except Exception:
+            entries = {}
+        scope = {'loaded_at': time.monotonic(), 'keys': [], 'rows': {}, 'matrix': None}
+        corrupt = []
+        for key, value in entries.items():
+            try:
+                self._append(scope, key.decode(), decode_embedding(value))
+            except Exception:
+                corrupt.append(key.decode())
+        if corrupt:
+            print(f"Dropping {len(corrupt)} unreadable semantic cache entries")
+            self._forget(scope_key, corrupt)
+        
+        with self._lock:
+            # Scopes of earlier index generations can no longer be looked up
+            generation = scope_key.split(':')[1]
+            for key in [key for key in self._scopes if key.split(':')[1] != generation]:
+                del self._scopes[key]
+            self._scopes[scope_key] = scope
+            self._scopes.move_to_end(scope_key)
+            while len(self._scopes) > self.max_scopes:
+                self._scopes.popitem(last=False)
+        return scope
+    
+    def _append(self, scope: Dict[str, Any], cache_key: str, embedding: List[float]):
+        """Add or replace a question's normalized embedding in a scope's matrix, growing it geometrically."""
+        import numpy as np
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+        matrix = scope['matrix']
+        if matrix is not None and vector.shape[0] != matrix.shape[1]:
+            raise ValueError(f"Embedding has {vector.shape[0]} dimensions, the scope has {matrix.shape[1]}")
+        row = scope['rows'].get(cache_key)
+        if row is None:
+            row = len(scope['keys'])
+            if matrix is None or row == matrix.shape[0]:
+                grown = np.zeros((max(2 * row, 64), vector.shape[0]), dtype=np.float32)
+                if matrix is not None:
+                    grown[:row] = matrix[:row]
+                scope['matrix'] = matrix = grown
+            scope['keys'].append(cache_key)
+            scope['rows'][cache_key] = row
+        matrix[row] = vector / (np.linalg.norm(vector) or 1.0)
+    
+    def _touch(self, scope_key: str, cache_key: str):
+        try:
+            redis_binary_client.zadd(f"{scope_key}:lru", {cache_key: time.time()}, xx=True)
+        except Exception:
+            pass
+    
+    def _forget(self, scope_key: str, cache_keys: List[str], in_redis: bool = True):
+        if in_redis:
+            try:
+                redis_binary_client.hdel(scope_key, *cache_keys)
+                redis_binary_client.zrem(f"{scope_key}:lru", *cache_keys)
+            except Exception:
+                pass
+        with self._lock:
+            scope = self._scopes.get(scope_key)
+            if scope is None:
+                return
+            # Move the last row into each removed row's place
+            for cache_key in cache_keys:
+                row = scope['rows'].pop(cache_key, None)
+                if row is None:
+                    continue
+                last_key = scope['keys'].pop()
+                if last_key != cache_key:
+                    scope['keys'][row] = last_key
+                    scope['rows'][last_key] = row
+                    scope['matrix'][row] = scope['matrix'][len(scope['keys'])]
+
+# Process-wide caches by embedding model, shared by every service
+_caches: Dict[str, SemanticCache] = {}
+_lock = threading.Lock()
+
+def get_semantic_cache(config: Dict[str, Any]) -> SemanticCache:
+    """Get the process-wide response cache for config.yaml's cache.semantic section."""
+    embedding_model = embedding_model_key(config['embedding'])
+    cache = _caches.get(embedding_model)
+    if cache is None:
+        with _lock:
+            cache = _caches.get(embedding_model)
+            if cache is None:
+                cache = _caches[embedding_model] = SemanticCache(config.get('cache', {}).get('semantic', {}), embedding_model)
+    return cache
@@ -1,63 +1,203 @@
 import os
-from typing import List, Dict
-from sentence_transformers import SentenceTransformer
-import chromadb
-from cache_utils import cache_embedding, get_cached_embedding
+import time
+from collections import deque
+from contextlib import closing
+from typing import Any, Callable, List, Dict, Iterable, Iterator, Optional, Tuple, Union
+import yaml
+from cache_utils import cache_embedding, get_cached_embedding, cache_embeddings, get_cached_embeddings, bump_index_generation
+from bm25_index import get_bm25_index
+from chunker import chunk_id, iter_chunks
+from embedders import embedding_model_key, get_embedding_backend
+from embedders.pool import EmbeddingPool
+from ingest.pipeline import prefetch
+from vector_stores import get_vector_store
 from dotenv import load_dotenv
 
 load_dotenv()
 
 class SimpleEmbeddingService:
-    def __init__(self):
-        # Use local sentence-transformers for embeddings
-        self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+    def __init__(self, config_path: str = "config.yaml"):
+        with open(config_path, 'r') as f:
+            self.config = yaml.safe_load(f)
         
-        # Initialize ChromaDB HTTP client
-        self.chroma_client = chromadb.HttpClient(
-            host=os.getenv('CHROMA_HOST', 'localhost'),
-            port=int(os.getenv('CHROMA_PORT', '8000'))
-        )
-        self.collection = self.chroma_client.get_or_create_collection("documents")
+        self.batch_size = self.config['embedding']['batch_size']
+        
+        # ChromaDB or the embedded local index, per config.yaml's vector_store section
+        self.vector_store = get_vector_store(self.config)
+        
+        # Lexical index over the same chunks, for hybrid retrieval
+        self.bm25_index = get_bm25_index(self.config)
+    
+    @property
+    def embedder(self):
+        """Shared embedding backend selected in config.yaml, loaded on first use."""
+        return get_embedding_backend(self.config['embedding'])
+    
+    @property
+    def embedding_model(self) -> str:
+        """Cache namespace for this config's embeddings: backend, model and quantization."""
+        return embedding_model_key(self.config['embedding'])
+    
+    def chunk_params(self, max_seq_length: int = None):
+        """Chunk size and overlap, capped at the model's input window so nothing is silently truncated."""
+        chunk_size = self.config['ingestion']['chunk_size']
+        # Chunks are sized in word tokens, but the model counts word pieces plus special tokens, which run higher
+        headroom = self.config['ingestion'].get('seq_length_headroom', 0.75)
+        max_chunk_size = min(chunk_size, int((max_seq_length or self.embedder.max_seq_length) * headroom))
+        return max_chunk_size, self.config['ingestion']['chunk_overlap'] * max_chunk_size // chunk_size
     
     def get_embedding(self, text: str) -> List[float]:
         """Get embedding with Redis caching."""
-        cached_embedding = get_cached_embedding(text)
+        cached_embedding = get_cached_embedding(text, self.embedding_model)
         if cached_embedding:
             return cached_embedding
         
-        embedding = self.embedding_model.encode(text).tolist()
-        cache_embedding(text, embedding)
+        embedding = self.embedder.encode([text])[0]
+        cache_embedding(text, self.embedding_model, embedding)
         return embedding
     
-    def add_documents(self, documents: List[Dict[str, str]]):
-        """Add documents to ChromaDB."""
-        for i, doc in enumerate(documents):
-            embedding = self.get_embedding(doc['content'])
-            self.collection.add(
-                embeddings=[embedding],
-                documents=[doc['content']],
-                metadatas=[{
-                    'source': doc['source'],
-                    'filename': doc['filename'],
-                    'type': doc['type']
-                }],
-                ids=[f"doc_{i}"]
+    def get_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Get embeddings for a batch of texts, encoding cache misses in one call."""
+        embeddings = get_cached_embeddings(texts, self.embedding_model)
+        missing = [i for i, embedding in enumerate(embeddings) if not embedding]
+        
+        if missing:
+            encoded = self.embedder.encode(
+                [texts[i] for i in missing],
+                batch_size=self.batch_size
             )
+            for i, embedding in zip(missing, encoded):
+                embeddings[i] = embedding
+            cache_embeddings(((texts[i], embeddings[i]) for i in missing), self.embedding_model)
+        
+        return embeddings
+    
+    def embed_batches(self, batches: Iterable[List[Dict]], pool: EmbeddingPool = None) -> Iterator[Tuple[List[Dict], List[List[float]]]]:
+        """Embed chunk batches in order, fanning cache misses out to the worker pool if given."""
+        if pool is None:
+            for batch in batches:
+                yield batch, self.get_embeddings([chunk['content'] for chunk in batch])
+            return
+        
+        pending = deque()
+        for batch in batches:
+            texts = [chunk['content'] for chunk in batch]
+            embeddings = get_cached_embeddings(texts, self.embedding_model)
+            missing = [i for i, embedding in enumerate(embeddings) if not embedding]
+            future = pool.submit([texts[i] for i in missing], self.batch_size) if missing else None
+            pending.append((batch, texts, embeddings, missing, future))
+            if len(pending) >= pool.max_in_flight:
+                yield self._collect_batch(*pending.popleft())
+        
+        while pending:
+            yield self._collect_batch(*pending.popleft())
+    
+    def _collect_batch(self, batch, texts, embeddings, missing, future):
+        """Wait for a pooled batch and cache the newly encoded vectors."""
+        if future is not None:
+            for i, embedding in zip(missing, future.result()):
+                embeddings[i] = embedding
+            cache_embeddings(((texts[i], embeddings[i]) for i in missing), self.embedding_model)
+        return batch, embeddings
+    
+    def _new_chunk_batches(self, chunks: Iterable[Dict], existing_ids, stats: Dict) -> Iterator[List[Dict]]:
+        """Group chunks that are not in the collection yet into embedding batches."""
+        batch = []
+        for chunk in chunks:
+            id_ = chunk_id(chunk['source'], chunk['content'])
+            stats['seen_sources'].add(chunk['source'])
+            if chunk['chunk_index'] == 0:
+                stats['documents'] += 1
+            if id_ in stats['seen_ids']:
+                continue
+            stats['seen_ids'].add(id_)
+            if id_ in existing_ids:
+                stats['unchanged'] += 1
+                # Backfill the lexical index for chunks embedded before it existed
+                if id_ not in self.bm25_index:
+                    self.bm25_index.add([id_], [chunk['content']], [self._chunk_metadata(chunk)])
+                continue
+            
+            chunk['id'] = id_
+            batch.append(chunk)
+            if len(batch) == self.batch_size:
+                yield batch
+                batch = []
+        
+        if batch:
+            yield batch
+    
+    def _chunk_metadata(self, chunk: Dict) -> Dict:
+        """Metadata stored with a chunk in the vector store and the lexical index."""
+        return {
+            'source': chunk['source'],
+            'filename': chunk['filename'],
+            'type': chunk['type'],
+            'chunk_index': chunk['chunk_index'],
+            # Lets the context packer budget prompts without re-tokenizing
+            'token_count': chunk['token_count']
+        }
+    
+    def add_documents(self, documents: Iterable[Dict[str, str]], prune: Union[bool, Callable[[], bool]] = False) -> Dict[str, int]:
+        """Upsert new document chunks into the vector store and delete stale ones; prune may be decided once documents are consumed."""
+        start_time = time.perf_counter()
+        existing_sources = self.vector_store.get_sources()
+        
+        stats = {'seen_ids': set(), 'seen_sources': set(), 'documents': 0, 'unchanged': 0}
+        added = 0
+        
+        workers = self.config['embedding'].get('workers', 1)
+        pool = EmbeddingPool(self.config['embedding']) if workers > 1 else None
+        try:
+            max_seq_length = pool.max_seq_length() if pool else None
+            chunks = iter_chunks(documents, *self.chunk_params(max_seq_length))
+            batches = self._new_chunk_batches(chunks, existing_sources, stats)
+            
+            # Loading, chunking and embedding run a few batches ahead of the upserts, and no further
+            upsert_queue = self.config['ingestion'].get('upsert_queue', 4)
+            with closing(prefetch(self.embed_batches(batches, pool), upsert_queue, "embed")) as embedded:
+                for batch, embeddings in embedded:
+                    ids = [chunk['id'] for chunk in batch]
+                    documents = [chunk['content'] for chunk in batch]
+                    metadatas = [self._chunk_metadata(chunk) for chunk in batch]
+                    self.vector_store.upsert(embeddings=embeddings, documents=documents, metadatas=metadatas, ids=ids)
+                    self.bm25_index.add(ids, documents, metadatas)
+                    added += len(batch)
+        finally:
+            if pool:
+                pool.close()
+        
+        # Remove chunks whose content changed; with prune, also chunks of sources not ingested this run.
+        # A run that loaded nothing prunes nothing, so an unreachable corpus doesn't empty the index
+        if callable(prune):
+            prune = prune()
+        prune = prune and stats['documents'] > 0
+        stale_ids = [
+            id_ for id_, source in existing_sources.items()
+            if id_ not in stats['seen_ids'] and (prune or source in stats['seen_sources'])
+        ]
+        for start in range(0, len(stale_ids), self.batch_size):
+            self.vector_store.delete(stale_ids[start:start + self.batch_size])
+        self.vector_store.persist()
+        
+        self.bm25_index.remove([
+            id_ for id_, source in self.bm25_index.get_sources().items()
+            if id_ not in stats['seen_ids'] and (prune or source in stats['seen_sources'])
+        ])
+        self.bm25_index.persist()
+        
+        # Cached answers were built from the old corpus
+        if added or stale_ids:
+            bump_index_generation()
+        
+        elapsed = time.perf_counter() - start_time
+        rate = stats['documents'] / elapsed if elapsed > 0 else 0.0
+        print(f"Indexed {stats['documents']} documents in {elapsed:.1f}s ({rate:.1f} docs/sec): "
+              f"{added} chunks added, {stats['unchanged']} unchanged, {len(stale_ids)} deleted")
+        
+        return {"documents": stats['documents'], "added": added, "unchanged": stats['unchanged'], "deleted": len(stale_ids)}
     
-    def search(self, query: str, n_results: int = 5) -> List[Dict]:
-        """Search for similar documents."""
+    def search(self, query: str, n_results: int = 5, where: Optional[Dict[str, Any]] = None) -> List[Dict]:
+        """Search for similar documents, optionally filtered by metadata."""
         query_embedding = self.get_embedding(query)
-        results = self.collection.query(
-            query_embeddings=[query_embedding],
-            n_results=n_results
-        )
-        
-        documents = []
-        for i in range(len(results['documents'][0])):
-            documents.append({
-                'content': results['documents'][0][i],
-                'metadata': results['metadatas'][0][i],
-                'distance': results['distances'][0][i]
-            })
-        
-        return documents
\ No newline at end of file
+        return self.vector_store.query(query_embedding, n_results=n_results, where=where)
@@ -1,128 +1,137 @@
 import os
 import asyncio
+import json
 import yaml
-from typing import List, Dict
+from typing import AsyncIterator, Dict, Iterator
 from dotenv import load_dotenv
 
-from ingest.load_docs import load_documents
-from ingest.load_pdfs import load_pdfs
-from ingest.crawler import crawl_websites
-from ingest.load_excel import load_excel_testcases
-from ingest.load_sharepoint import load_sharepoint_documents
-from ingest.load_azure_wiki import load_azure_devops_wiki
+from ingest.load_docs import iter_documents
+from ingest.load_pdfs import iter_pdfs
+from ingest.crawler import iter_websites
+from ingest.load_excel import iter_excel_testcases
+from ingest.load_sharepoint import iter_sharepoint_documents
+from ingest.load_azure_wiki import iter_azure_devops_wiki
+from ingest.orchestrator import IngestOrchestrator
 from simple_embedding import SimpleEmbeddingService
 from simple_qa import SimpleQAService
+from model_registry import warmup
 from database import create_tables
 
 load_dotenv()
-create_tables()
 
 class SimpleChatbotApp:
     def __init__(self, config_path: str = "config.yaml"):
         with open(config_path, 'r') as f:
             self.config = yaml.safe_load(f)
         
-        self.embedding_service = SimpleEmbeddingService()
+        # Not at import time: spawned PDF and embedding workers re-import the main module
+        create_tables()
+        
+        self.embedding_service = SimpleEmbeddingService(config_path)
         self.qa_service = SimpleQAService(self.embedding_service)
+        # The last ingestion run, which decides whether stale sources may be pruned
+        self.orchestrator = None
     
-    async def ingest_all_data(self) -> List[Dict[str, str]]:
-        """Ingest data from all sources."""
-        all_documents = []
+    async def ingest_all_data(self) -> Iterator[Dict[str, str]]:
+        """Stream documents from all sources, loaded concurrently."""
+        orchestrator = IngestOrchestrator(self.config['ingestion'].get('orchestrator', {}))
         
-        # Load documents from DOCS_DIR
+        # Load documents from DOCS_DIR and MDS_DIR
         if os.getenv('DOCS_DIR'):
-            print("Loading documents from DOCS_DIR...")
-            docs = load_documents(os.getenv('DOCS_DIR'))
-            all_documents.extend(docs)
-            print(f"Loaded {len(docs)} documents from DOCS_DIR")
-        
-        # Load documents from MDS_DIR
+            orchestrator.register('docs', iter_documents, os.getenv('DOCS_DIR'))
         if os.getenv('MDS_DIR'):
-            print("Loading documents from MDS_DIR...")
-            mds_docs = load_documents(os.getenv('MDS_DIR'))
-            all_documents.extend(mds_docs)
-            print(f"Loaded {len(mds_docs)} documents from MDS_DIR")
+            orchestrator.register('mds', iter_documents, os.getenv('MDS_DIR'))
         
         # Load Excel/CSV test cases
         if os.getenv('EXCEL_DIR'):
-            print("Loading Excel/CSV test cases...")
-            excel_docs = load_excel_testcases(os.getenv('EXCEL_DIR'))
-            all_documents.extend(excel_docs)
-            print(f"Loaded {len(excel_docs)} test case documents")
+            orchestrator.register('excel', iter_excel_testcases, os.getenv('EXCEL_DIR'))
         
-        # Load PDFs
-        print("Loading PDFs...")
-        pdfs = load_pdfs(os.getenv('PDF_DIR', './data/pdfs'))
-        all_documents.extend(pdfs)
-        print(f"Loaded {len(pdfs)} PDFs")
+        # Load PDFs; pages are extracted on their own process pool
+        orchestrator.register(
+            'pdfs', iter_pdfs, os.getenv('PDF_DIR', './data/pdfs'), self.config['ingestion'].get('pdf', {}),
+            reserved_cores=max(self.config['embedding'].get('workers', 1), 1)
+        )
         
         # Crawl websites
-        print("Crawling websites...")
-        web_docs = await crawl_websites(
-            self.config['crawling']['urls_to_crawl'],
+        orchestrator.register(
+            'web', iter_websites, self.config['crawling']['urls_to_crawl'], kind='async',
             max_pages=self.config['crawling']['max_pages'],
             crawl_depth=self.config['crawling']['crawl_depth']
         )
-        all_documents.extend(web_docs)
-        print(f"Crawled {len(web_docs)} web pages")
         
         # Load SharePoint documents from multiple sites
         if os.getenv('SHAREPOINT_SITE_URLS'):
-            print("Loading SharePoint documents...")
-            sp_docs = load_sharepoint_documents(
+            orchestrator.register(
+                'sharepoint', iter_sharepoint_documents,
                 os.getenv('SHAREPOINT_SITE_URLS'),
                 os.getenv('SHAREPOINT_USERNAME'),
                 os.getenv('SHAREPOINT_PASSWORD')
             )
-            all_documents.extend(sp_docs)
-            print(f"Loaded {len(sp_docs)} SharePoint documents")
         
         # Load Azure DevOps Wiki
         if os.getenv('AZURE_DEVOPS_ORGANIZATION'):
-            print("Loading Azure DevOps wiki...")
-            wiki_docs = load_azure_devops_wiki(
+            orchestrator.register(
+                'azure_wiki', iter_azure_devops_wiki,
                 os.getenv('AZURE_DEVOPS_ORGANIZATION'),
                 os.getenv('AZURE_DEVOPS_PROJECT'),
                 os.getenv('AZURE_DEVOPS_WIKI_ID'),
                 os.getenv('AZURE_DEVOPS_PAT_TOKEN')
             )
-            all_documents.extend(wiki_docs)
-            print(f"Loaded {len(wiki_docs)} Azure DevOps wiki pages")
         
-        return all_documents
+        self.orchestrator = orchestrator
+        return orchestrator.iter_documents()
     
     async def initialize(self, force_reindex: bool = False):
         """Initialize the chatbot."""
         print("Starting data ingestion...")
         documents = await self.ingest_all_data()
         
-        if documents:
-            print(f"Adding {len(documents)} documents to vector store...")
-            self.embedding_service.add_documents(documents)
+        # Documents flow straight from the loaders through chunking and embedding into the vector store
+        # Chunks of sources no longer present are pruned only if no source failed or timed out
+        stats = await asyncio.to_thread(
+            self.embedding_service.add_documents, documents, prune=self.orchestrator.succeeded
+        )
+        if stats['documents']:
             print("Documents added successfully!")
             return True
         else:
             print("No documents found.")
             return False
     
-    def ask_question(self, question: str, use_cache: bool = True, source_filter: str = "all") -> Dict[str, any]:
+    def ask_question(self, question: str, use_cache: bool = True, source_filter: str = "all",
+                     exact_match: bool = False) -> Dict[str, any]:
         """Ask a question to the chatbot."""
-        return self.qa_service.answer_question(question, use_cache, source_filter)
+        return self.qa_service.answer_question(question, use_cache, source_filter, exact_match)
+    
+    async def ask_question_async(self, question: str, use_cache: bool = True, source_filter: str = "all",
+                                 exact_match: bool = False) -> Dict[str, any]:
+        """Ask a question to the chatbot without blocking the event loop."""
+        return await self.qa_service.answer_question_async(question, use_cache, source_filter, exact_match)
+    
+    def ask_question_stream(self, question: str, use_cache: bool = True, source_filter: str = "all",
+                            exact_match: bool = False) -> AsyncIterator[Dict[str, any]]:
+        """Stream the answer as QA events."""
+        return self.qa_service.answer_question_stream(question, use_cache, source_filter, exact_match)
 
 # CLI interface
 def main():
     app = SimpleChatbotApp()
     
+    # Load the embedding model while the loaders do their I/O
+    warmup(app.config['embedding'])
     success = asyncio.run(app.initialize())
     if not success:
         print("Failed to initialize chatbot.")
         return
     
-    print("\nChatbot ready! Type 'quit' to exit.")
+    print("\nChatbot ready! Type 'stats' for cache and provider statistics, 'quit' to exit.")
     while True:
         question = input("\nYour question: ")
         if question.lower() in ['quit', 'exit']:
             break
+        if question.lower() == 'stats':
+            print(json.dumps(app.qa_service.stats(), indent=2))
+            continue
         
         response = app.ask_question(question)
         print(f"\nAnswer: {response['answer']}")
@@ -1,9 +1,17 @@
 import os
 import asyncio
-from typing import Dict, List
-from providers.groq_provider import GroqProvider
+import time
+from typing import AsyncIterator, Dict, List
+from providers import build_llm_provider, LLMProviderError
 from simple_embedding import SimpleEmbeddingService
-from cache_utils import get_cached_response, cache_response
+from cache_utils import generate_cache_key, get_cache_stats, get_cached_response
+from semantic_cache import get_semantic_cache
+from single_flight import get_single_flight
+from retrieval_filters import build_where
+from hybrid_search import hybrid_search, score_cutoff
+from reranker import get_reranker
+from context_packer import get_context_packer
+from async_runtime import run_sync
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -11,50 +19,137 @@ load_dotenv()
 class SimpleQAService:
     def __init__(self, embedding_service: SimpleEmbeddingService):
         self.embedding_service = embedding_service
-        self.llm_provider = GroqProvider(
-            api_key=os.getenv('GROQ_API_KEY'),
-            model=os.getenv('GROQ_MODEL')
+        self.reranker = get_reranker(embedding_service.config['retrieval'])
+        self.context_packer = get_context_packer(embedding_service.config)
+        self.response_cache = get_semantic_cache(embedding_service.config)
+        self.single_flight = get_single_flight(embedding_service.config)
+        # Groq, hedged to and failed over to the other providers in config.yaml's llm section
+        self.llm_provider = build_llm_provider(embedding_service.config['llm'])
+        # Cached answers are scoped to the primary model
+        self.cache_model = self.llm_provider.model
+    
+    def stats(self) -> Dict[str, any]:
+        """Cache hit rates and LLM provider latencies, for monitoring."""
+        return {
+            "response_cache": self.response_cache.stats(),
+            "local_caches": get_cache_stats(),
+            "providers": self.llm_provider.stats()
+        }
+    
+    def answer_question(self, question: str, use_cache: bool = True, source_filter: str = "all",
+                        exact_match: bool = False) -> Dict[str, any]:
+        """Answer question using RAG, blocking until the answer is ready."""
+        return run_sync(self.answer_question_async(question, use_cache, source_filter, exact_match))
+    
+    def _retrieve(self, question: str, source_filter: str) -> List[Dict]:
+        """Search for relevant documents of the selected source types, fusing dense and BM25 rankings."""
+        where = build_where(source_filter)
+        results = hybrid_search(
+            question,
+            lambda n_results: self.embedding_service.search(question, n_results=n_results, where=where),
+            self.embedding_service.bm25_index,
+            self.embedding_service.config['retrieval'],
+            n_results=self.reranker.candidates if self.reranker else 5,
+            where=where
         )
+        
+        # Irrelevant chunks only slow the LLM down; with none left the question is answered without it
+        results = score_cutoff(results, self.embedding_service.config['retrieval'])
+        
+        # Over-fetched candidates are cut down to the few best by the cross-encoder
+        if self.reranker:
+            results = self.reranker.rerank(question, results)
+        return results
+    
+    async def answer_question_async(self, question: str, use_cache: bool = True, source_filter: str = "all",
+                                    exact_match: bool = False) -> Dict[str, any]:
+        """Answer question using RAG; exact_match disables the similar-question cache."""
+        async for event in self.answer_question_stream(question, use_cache, source_filter, exact_match):
+            if event["type"] == "done":
+                return event["response"]
     
-    def answer_question(self, question: str, use_cache: bool = True, source_filter: str = "all") -> Dict[str, any]:
-        """Answer question using RAG with Groq."""
+    async def answer_question_stream(self, question: str, use_cache: bool = True, source_filter: str = "all",
+                                     exact_match: bool = False) -> AsyncIterator[Dict[str, any]]:
+        """Stream the answer as {"type": "delta", "text"} events, then one {"type": "done", "response"} event."""
+        start_time = time.perf_counter()
+        embed_question = lambda: self.embedding_service.get_embedding(question)
         
-        # Check cache
+        # Check cache; Redis, embedding and retrieval calls block, so they run off the event loop
         if use_cache:
-            cached_response = get_cached_response(question, {"source_filter": source_filter}, "groq")
-            if cached_response:
-                return {"answer": cached_response, "sources": [], "cached": True}
+            cached = await asyncio.to_thread(
+                self.response_cache.get, question, {"source_filter": source_filter}, self.cache_model, embed_question, exact_match
+            )
+            if cached:
+                yield {"type": "delta", "text": cached['response']['answer']}
+                yield {"type": "done", "response": {**cached['response'], "cached": True, "cache_similarity": cached['similarity']}}
+                return
         
-        # Search for relevant documents
-        results = self.embedding_service.search(question, n_results=5)
+        # Identical questions already in flight are answered once; followers get the leader's response
+        flight = None
+        if use_cache:
+            flight = await self.single_flight.join(
+                generate_cache_key(question, {"source_filter": source_filter}, self.cache_model),
+                lambda: get_cached_response(question, {"source_filter": source_filter}, self.cache_model)
+            )
+            if flight.result is not None:
+                yield {"type": "delta", "text": flight.result['answer']}
+                yield {"type": "done", "response": {**flight.result, "cached": True, "coalesced": True}}
+                return
         
-        # Filter by source type
-        if source_filter != "all":
-            filtered_results = []
-            for result in results:
-                doc_type = result['metadata'].get('type', '')
-                if source_filter == "docs" and doc_type in ['document', 'pdf']:
-                    filtered_results.append(result)
-                elif source_filter == "web" and doc_type == 'web':
-                    filtered_results.append(result)
-            results = filtered_results
+        try:
+            async for event in self._generate_stream(question, use_cache, source_filter, start_time, embed_question):
+                if event["type"] == "done" and flight:
+                    # An error answer is not a result to share; followers answer for themselves
+                    flight.complete(None if event.get("failed") else event["response"])
+                yield event
+        finally:
+            # Followers of an abandoned or failed leader fall back to answering for themselves
+            if flight:
+                flight.complete(None)
+    
+    async def _generate_stream(self, question: str, use_cache: bool, source_filter: str, start_time: float,
+                               embed_question) -> AsyncIterator[Dict[str, any]]:
+        """Retrieve, generate and cache an answer, streaming QA events."""
+        results = await asyncio.to_thread(self._retrieve, question, source_filter)
         
         if not results:
-            return {"answer": "I couldn't find relevant information to answer your question.", "sources": [], "cached": False}
+            answer = "I couldn't find relevant information to answer your question."
+            yield {"type": "delta", "text": answer}
+            yield {"type": "done", "response": {
+                "answer": answer,
+                "sources": [],
+                "cached": False,
+                "timing": {"total_ms": round((time.perf_counter() - start_time) * 1000, 1)}
+            }}
+            return
+        
+        retrieval_time = time.perf_counter()
         
-        # Generate answer using Groq
-        context = "\n\n".join([result['content'][:500] for result in results[:3]])
+        # Generate answer from the best distinct chunks that fit the prompt budget, passing tokens on as they arrive
         system_prompt = "You are a helpful assistant. Answer the question based on the provided context."
+        context, packed = self.context_packer.pack(results, self.context_packer.budget(system_prompt, question))
         user_prompt = f"Context: {context}\n\nQuestion: {question}"
         
+        deltas = []
+        first_token_time = None
+        failed = False
         try:
-            answer = asyncio.run(self.llm_provider.generate_response(system_prompt, user_prompt))
-        except Exception as e:
-            answer = f"Error generating response: {str(e)}"
+            async for delta in self.llm_provider.stream_response(system_prompt, user_prompt):
+                first_token_time = first_token_time or time.perf_counter()
+                deltas.append(delta)
+                yield {"type": "delta", "text": delta}
+        except LLMProviderError as e:
+            failed = True
+            delta = f"Error generating response: {str(e)}"
+            deltas.append(delta)
+            yield {"type": "delta", "text": delta}
+        answer = "".join(deltas)
         
-        # Extract sources
+        generation_time = time.perf_counter()
+        
+        # Extract sources: only the chunks the answer was actually given
         sources = []
-        for result in results:
+        for result in packed:
             sources.append({
                 "filename": result['metadata'].get('filename', 'Unknown'),
                 "source": result['metadata'].get('source', 'Unknown'),
@@ -62,8 +157,22 @@ class SimpleQAService:
                 "content_preview": result['content'][:200] + "..." if len(result['content']) > 200 else result['content']
             })
         
-        # Cache response
-        if use_cache:
-            cache_response(question, {"source_filter": source_filter}, "groq", answer)
+        response = {
+            "answer": answer,
+            "sources": sources,
+            "timing": {
+                "retrieval_ms": round((retrieval_time - start_time) * 1000, 1),
+                "first_token_ms": round(((first_token_time or generation_time) - start_time) * 1000, 1),
+                "generation_ms": round((generation_time - retrieval_time) * 1000, 1),
+                "total_ms": round((time.perf_counter() - start_time) * 1000, 1)
+            }
+        }
+        
+        # Cache the full response once the stream completes, so cache hits keep their sources;
+        # error answers are not cached
+        if use_cache and not failed:
+            await asyncio.to_thread(
+                self.response_cache.put, question, {"source_filter": source_filter}, self.cache_model, response, embed_question
+            )
         
-        return {"answer": answer, "sources": sources, "cached": False}
\ No newline at end of file
+        yield {"type": "done", "failed": failed, "response": {**response, "cached": False}}
\ No newline at end of file
@@ -0,0 +1,118 @@
+import asyncio
+import concurrent.futures
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional
+from cache_utils import redis_client
+
+# Deletes the lock only if this request still holds it
+RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+class Flight:
+    """One request's place in a single-flight group: the leader, or a follower holding the leader's result."""
+    
+    def __init__(self, group: 'SingleFlight', key: str, leader: bool, result: Optional[Dict[str, Any]] = None,
+                 future: concurrent.futures.Future = None, token: str = None):
+        self.group = group
+        self.key = key
+        self.leader = leader
+        self.result = result
+        self._future = future
+        self._token = token
+    
+    def complete(self, result: Optional[Dict[str, Any]]):
+        """Hand the leader's result (None if it failed) to waiting followers and release the lock."""
+        if self.leader:
+            self.group._finish(self.key, self._future, result, self._token)
+            self.leader = False
+
+class SingleFlight:
+    """Coalesces identical in-flight requests so only one of them does the work."""
+    
+    def __init__(self, single_flight_config: Dict[str, Any]):
+        self.redis_lock = single_flight_config.get('redis_lock', True)
+        self.lock_ttl_ms = single_flight_config.get('lock_ttl_ms', 30000)
+        self.poll_interval = single_flight_config.get('poll_ms', 100) / 1000
+        self.wait_timeout = single_flight_config.get('wait_timeout_s', 60)
+        self._inflight: Dict[str, concurrent.futures.Future] = {}
+        self._lock = threading.Lock()
+    
+    async def join(self, key: str, lookup: Callable[[], Optional[Dict[str, Any]]]) -> Flight:
+        """Lead the work for key, or wait for the request already leading it; leaders must complete() their flight."""
+        # lookup reads a leader's result from the shared cache, which is how other processes see it
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = concurrent.futures.Future()
+        
+        if not leader:
+            # Futures work across threads and event loops; shield keeps a timeout from cancelling the leader's
+            try:
+                result = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), self.wait_timeout)
+            except asyncio.TimeoutError:
+                result = None
+            return Flight(self, key, leader=False, result=result)
+        
+        token = None
+        if self.redis_lock:
+            token = uuid.uuid4().hex
+            try:
+                acquired = await asyncio.to_thread(redis_client.set, f"single_flight:{key}", token, nx=True, px=self.lock_ttl_ms)
+            except Exception:
+                acquired = True  # Without Redis, coalesce in-process only
+                token = None
+            if not acquired:
+                # Another process is leading; wait for it to publish its result
+                result = await self._wait_for_remote(key, lookup)
+                if result is not None:
+                    self._finish(key, future, result, None)
+                    return Flight(self, key, leader=False, result=result)
+                token = None
+        
+        return Flight(self, key, leader=True, future=future, token=token)
+    
+    async def _wait_for_remote(self, key: str, lookup: Callable[[], Optional[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+        """Poll for another process's result until it appears, its lock is released or the wait times out."""
+        deadline = time.monotonic() + self.wait_timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(self.poll_interval)
+            result = await asyncio.to_thread(lookup)
+            if result is not None:
+                return result
+            try:
+                if not await asyncio.to_thread(redis_client.exists, f"single_flight:{key}"):
+                    return await asyncio.to_thread(lookup)
+            except Exception:
+                return None
+        return None
+    
+    def _finish(self, key: str, future: concurrent.futures.Future, result: Optional[Dict[str, Any]], token: Optional[str]):
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+        if not future.done():
+            future.set_result(result)
+        if token:
+            try:
+                redis_client.eval(RELEASE_LOCK_SCRIPT, 1, f"single_flight:{key}", token)
+            except Exception:
+                pass
+
+_single_flight: Optional[SingleFlight] = None
+_lock = threading.Lock()
+
+def get_single_flight(config: Dict[str, Any]) -> SingleFlight:
+    """Get the process-wide single-flight group for config.yaml's cache.single_flight section."""
+    global _single_flight
+    if _single_flight is None:
+        with _lock:
+            if _single_flight is None:
+                _single_flight = SingleFlight(config.get('cache', {}).get('single_flight', {}))
+    return _single_flight
@@ -1,6 +1,8 @@
 import streamlit as st
-import asyncio
 from main import ChatbotApp
+from async_runtime import iterate_sync, run_sync
+from model_registry import warmup
+from retrieval_filters import SOURCE_FILTERS
 
 # Page config
 st.set_page_config(
@@ -13,9 +15,8 @@ st.set_page_config(
 def initialize_chatbot():
     """Initialize chatbot with caching."""
     app = ChatbotApp()
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    success = loop.run_until_complete(app.initialize())
+    warmup(app.config['embedding'])
+    success = run_sync(app.initialize())
     return app if success else None
 
 def main():
@@ -37,7 +38,7 @@ def main():
         
         source_filter = st.selectbox(
             "Source Filter",
-            ["all", "docs", "web"],
+            list(SOURCE_FILTERS),
             help="Filter responses by source type"
         )
         
@@ -47,6 +48,12 @@ def main():
             help="Use cached responses for faster replies"
         )
         
+        exact_match = st.checkbox(
+            "Exact-match cache only",
+            value=False,
+            help="Only reuse answers cached for this exact question, not for similar ones"
+        )
+        
         if st.button("Clear Chat History"):
             st.session_state.messages = []
             st.rerun()
@@ -55,7 +62,19 @@ def main():
         st.markdown("**Source Types:**")
         st.markdown("- **docs**: Local documents and PDFs")
         st.markdown("- **web**: Crawled websites")
+        st.markdown("- **business_knowledge**: Excel/CSV test cases")
+        st.markdown("- **azure_wiki**: Azure DevOps wiki pages")
+        st.markdown("- **sharepoint**: SharePoint documents")
+        st.markdown("- **wiki**: Confluence and MediaWiki pages")
         st.markdown("- **all**: All sources")
+        
+        st.markdown("---")
+        with st.expander("Cache & provider stats", expanded=False):
+            stats = st.session_state.chatbot.qa_service.stats()
+            st.metric("Response cache hit rate", f"{stats['response_cache']['hit_rate']:.0%}")
+            st.table([{"cache": namespace, **counters} for namespace, counters in stats['local_caches'].items()])
+            if stats['providers']:
+                st.table(stats['providers'])
     
     # Initialize chat history
     if "messages" not in st.session_state:
@@ -85,26 +104,39 @@ def main():
         with st.chat_message("user"):
             st.markdown(prompt)
         
-        # Generate response
+        # Generate response, rendering tokens as they arrive
         with st.chat_message("assistant"):
-            with st.spinner("Thinking..."):
-                response = st.session_state.chatbot.ask_question(
-                    prompt, 
-                    use_cache=use_cache, 
-                    source_filter=source_filter
-                )
+            events = iterate_sync(st.session_state.chatbot.ask_question_stream(
+                prompt, 
+                use_cache=use_cache, 
+                source_filter=source_filter,
+                exact_match=exact_match
+            ))
+            response = {}
+            
+            def answer_deltas():
+                for event in events:
+                    if event["type"] == "delta":
+                        yield event["text"]
+                    else:
+                        response.update(event["response"])
+            
+            answer = st.write_stream(answer_deltas())
             
             if "error" in response:
                 st.error(response["error"])
                 return
             
-            # Display answer
-            answer = response["answer"]
-            st.markdown(answer)
+            timing = response.get("timing", {})
+            if "first_token_ms" in timing and not response.get("cached", False):
+                st.caption(f"First token in {timing['first_token_ms']:.0f} ms, complete in {timing['total_ms']:.0f} ms")
             
             # Show cache indicator
             if response.get("cached", False):
-                st.info("ℹ️ This response was retrieved from cache")
+                if response.get("cache_similarity", 1.0) < 1.0:
+                    st.info(f"ℹ️ This response was cached for a similar question ({response['cache_similarity']:.0%} match)")
+                else:
+                    st.info("ℹ️ This response was retrieved from cache")
             
             # Show sources
             sources = response.get("sources", [])
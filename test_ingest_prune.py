@@ -0,0 +1,81 @@
+import tempfile
+from pathlib import Path
+from unittest import mock
+import requests
+import yaml
+from bm25_index import BM25Index
+from ingest.load_azure_wiki import iter_azure_devops_wiki
+from ingest.orchestrator import IngestOrchestrator
+from simple_embedding import SimpleEmbeddingService
+from vector_stores.local_store import LocalVectorStore
+
+WIKI_URL = "https://dev.azure.com/org/project/_wiki/wikis/wiki?pagePath=/Budget"
+
+WIKI_PAGE = {
+    'content': "Budget Authority is approved by the finance team before the fiscal year starts.",
+    'source': WIKI_URL,
+    'filename': 'Budget',
+    'type': 'azure_wiki'
+}
+
+LOCAL_DOC = {
+    'content': "The dashboard lists every acquisition with its current milestone.",
+    'source': './data/docs/dashboard.md',
+    'filename': 'dashboard.md',
+    'type': 'docs'
+}
+
+class FakeEmbedder:
+    """Deterministic stand-in for the embedding model."""
+    
+    max_seq_length = 256
+    
+    def encode(self, texts, batch_size: int = 32):
+        return [[float(len(text)), float(sum(map(ord, text)) % 97), 1.0] for text in texts]
+
+class OfflineEmbeddingService(SimpleEmbeddingService):
+    """SimpleEmbeddingService over a temporary local store and the fake embedder."""
+    
+    def __init__(self, path: str):
+        with open(Path(__file__).parent / "config.yaml", 'r') as f:
+            self.config = yaml.safe_load(f)
+        self.config['embedding']['workers'] = 1
+        self.batch_size = self.config['embedding']['batch_size']
+        self.vector_store = LocalVectorStore(path)
+        self.bm25_index = BM25Index()
+    
+    @property
+    def embedder(self):
+        return FakeEmbedder()
+
+def failed_response(status_code: int) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status_code
+    response.url = "https://dev.azure.com/org/project/_apis/wiki/wikis/wiki/pages"
+    return response
+
+def test_failed_source_keeps_its_indexed_chunks():
+    """A source whose requests fail is reported as failed, and prune leaves its chunks alone."""
+    failures = {
+        "network outage": {'side_effect': requests.ConnectionError("network is unreachable")},
+        "expired token": {'return_value': failed_response(401)},
+    }
+    for failure, patch in failures.items():
+        with tempfile.TemporaryDirectory() as path:
+            service = OfflineEmbeddingService(path)
+            service.add_documents([WIKI_PAGE, LOCAL_DOC], prune=True)
+            
+            orchestrator = IngestOrchestrator({})
+            orchestrator.register('docs', iter, [LOCAL_DOC])
+            orchestrator.register('azure_wiki', iter_azure_devops_wiki, 'org', 'project', 'wiki', 'token')
+            with mock.patch('requests.get', **patch):
+                service.add_documents(orchestrator.iter_documents(), prune=orchestrator.succeeded)
+            
+            statuses = {report['source']: report['status'] for report in orchestrator.reports}
+            assert statuses == {'docs': 'ok', 'azure_wiki': 'failed'}, failure
+            assert WIKI_URL in service.vector_store.get_sources().values(), failure
+            assert WIKI_URL in service.bm25_index.get_sources().values(), failure
+
+if __name__ == "__main__":
+    test_failed_source_keeps_its_indexed_chunks()
+    print("✅ Chunks of a failed source survive pruning")
@@ -0,0 +1,50 @@
+import os
+import threading
+from typing import Any, Dict
+from .base import BaseVectorStore
+from .chroma_store import ChromaStore
+from .local_store import LocalVectorStore
+
+VECTOR_STORES = {
+    "chroma": ChromaStore,
+    "local": LocalVectorStore,
+}
+
+# Open stores, one per backend, location and collection, shared by every service in the process
+_stores: Dict[str, BaseVectorStore] = {}
+_lock = threading.Lock()
+
+def create_vector_store(config: Dict[str, Any]) -> BaseVectorStore:
+    """Create the vector store selected by config.yaml's vector_store section."""
+    store_config = config.get('vector_store', {})
+    backend = store_config.get('backend', 'chroma')
+    collection_name = store_config.get('collection', 'documents')
+    if backend == 'local':
+        hnsw_config = store_config.get('hnsw', {})
+        return LocalVectorStore(
+            os.getenv('VECTOR_DB_PATH', './data/vector_db'),
+            collection_name,
+            M=hnsw_config.get('M', 16),
+            ef_construction=hnsw_config.get('ef_construction', 200),
+            ef_search=hnsw_config.get('ef_search', 64),
+            compact_ratio=store_config.get('compact_ratio', 0.3)
+        )
+    return VECTOR_STORES[backend](collection_name)
+
+def get_vector_store(config: Dict[str, Any]) -> BaseVectorStore:
+    """Get the process-wide vector store for this config, opening it on first use."""
+    store_config = config.get('vector_store', {})
+    backend = store_config.get('backend', 'chroma')
+    if backend == 'local':
+        location = os.getenv('VECTOR_DB_PATH', './data/vector_db')
+    else:
+        location = f"{os.getenv('CHROMA_HOST', 'localhost')}:{os.getenv('CHROMA_PORT', '8000')}"
+    key = f"{backend}:{location}:{store_config.get('collection', 'documents')}"
+    
+    store = _stores.get(key)
+    if store is None:
+        with _lock:
+            store = _stores.get(key)
+            if store is None:
+                store = _stores[key] = create_vector_store(config)
+    return store
@@ -0,0 +1,47 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+
+class BaseVectorStore(ABC):
+    """Base class for vector stores."""
+    
+    @abstractmethod
+    def get_sources(self) -> Dict[str, str]:
+        """Map every stored chunk ID to its source."""
+        pass
+    
+    @abstractmethod
+    def upsert(self, ids: List[str], embeddings: List[List[float]], documents: List[str], metadatas: List[Dict[str, Any]]):
+        """Insert or replace chunks."""
+        pass
+    
+    @abstractmethod
+    def delete(self, ids: List[str]):
+        """Delete chunks by ID."""
+        pass
+    
+    @abstractmethod
+    def delete_where(self, where: Dict[str, Any]):
+        """Delete every chunk matching a Chroma-style where clause."""
+        pass
+    
+    @abstractmethod
+    def query(self, embedding: List[float], n_results: int = 5, where: Optional[Dict[str, Any]] = None) -> List[Dict]:
+        """Find the chunks nearest to embedding, optionally filtered by a Chroma-style where clause.
+        
+        Results have 'id', 'content', 'metadata', 'distance' and 'score' (cosine similarity).
+        """
+        pass
+    
+    @abstractmethod
+    def reset(self):
+        """Delete every chunk in the store."""
+        pass
+    
+    @abstractmethod
+    def as_llama_vector_store(self):
+        """LlamaIndex vector store backed by this store."""
+        pass
+    
+    def persist(self):
+        """Flush pending writes to durable storage."""
+        pass
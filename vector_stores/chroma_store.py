@@ -0,0 +1,70 @@
+import os
+from typing import Any, Dict, List, Optional
+import chromadb
+from .base import BaseVectorStore
+
+class ChromaStore(BaseVectorStore):
+    """Vector store backed by the ChromaDB HTTP server."""
+    
+    def __init__(self, collection_name: str = "documents"):
+        self.collection_name = collection_name
+        self.chroma_client = chromadb.HttpClient(
+            host=os.getenv('CHROMA_HOST', 'localhost'),
+            port=int(os.getenv('CHROMA_PORT', '8000'))
+        )
+        self.collection = self.chroma_client.get_or_create_collection(collection_name)
+    
+    def get_sources(self) -> Dict[str, str]:
+        existing = self.collection.get(include=['metadatas'])
+        return {
+            id_: (metadata or {}).get('source')
+            for id_, metadata in zip(existing['ids'], existing['metadatas'])
+        }
+    
+    def upsert(self, ids: List[str], embeddings: List[List[float]], documents: List[str], metadatas: List[Dict[str, Any]]):
+        self.collection.upsert(ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas)
+    
+    def delete(self, ids: List[str]):
+        self.collection.delete(ids=ids)
+    
+    def delete_where(self, where: Dict[str, Any]):
+        self.collection.delete(where=where)
+    
+    def query(self, embedding: List[float], n_results: int = 5, where: Optional[Dict[str, Any]] = None) -> List[Dict]:
+        results = self.collection.query(
+            query_embeddings=[embedding],
+            n_results=n_results,
+            where=where
+        )
+        
+        documents = []
+        for i in range(len(results['documents'][0])):
+            distance = results['distances'][0][i]
+            documents.append({
+                'id': results['ids'][0][i],
+                'content': results['documents'][0][i],
+                'metadata': results['metadatas'][0][i],
+                'distance': distance,
+                'score': self._similarity(distance)
+            })
+        
+        return documents
+    
+    def _similarity(self, distance: float) -> float:
+        """Convert a Chroma distance to cosine similarity for normalized embeddings."""
+        space = (self.collection.metadata or {}).get('hnsw:space', 'l2')
+        if space == 'l2':
+            return 1.0 - distance / 2.0  # Chroma's l2 is squared: |a - b|^2 = 2 - 2cos
+        return 1.0 - distance
+    
+    def reset(self):
+        try:
+            self.chroma_client.delete_collection(self.collection_name)
+        except Exception:
+            pass
+        self.collection = self.chroma_client.get_or_create_collection(self.collection_name)
+    
+    def as_llama_vector_store(self):
+        # Not LlamaIndex's ChromaVectorStore: its node scores are not cosine similarities, which score_cutoff needs
+        from .llama_adapter import LlamaVectorStoreAdapter
+        return LlamaVectorStoreAdapter(self)
@@ -0,0 +1,77 @@
+from typing import Any, Dict, List, Optional
+from llama_index.core.bridge.pydantic import PrivateAttr
+from llama_index.core.schema import BaseNode
+from llama_index.core.vector_stores.types import (
+    BasePydanticVectorStore,
+    MetadataFilters,
+    VectorStoreQuery,
+    VectorStoreQueryResult,
+)
+from llama_index.core.vector_stores.utils import metadata_dict_to_node, node_to_metadata_dict
+
+# LlamaIndex filter operators and their Chroma-style where equivalents
+WHERE_OPERATORS = {
+    "==": "$eq", "!=": "$ne", ">": "$gt", ">=": "$gte", "<": "$lt", "<=": "$lte", "in": "$in", "nin": "$nin",
+}
+
+def filters_to_where(filters: MetadataFilters) -> Optional[Dict[str, Any]]:
+    """Translate LlamaIndex MetadataFilters into a Chroma-style where clause."""
+    clauses = []
+    for metadata_filter in filters.filters:
+        if isinstance(metadata_filter, MetadataFilters):
+            clause = filters_to_where(metadata_filter)
+        else:
+            operator = getattr(metadata_filter.operator, 'value', metadata_filter.operator)
+            clause = {metadata_filter.key: {WHERE_OPERATORS[operator]: metadata_filter.value}}
+        if clause:
+            clauses.append(clause)
+    
+    if len(clauses) <= 1:
+        return clauses[0] if clauses else None
+    condition = getattr(filters.condition, 'value', filters.condition) or 'and'
+    return {f"${condition}": clauses}
+
+class LlamaVectorStoreAdapter(BasePydanticVectorStore):
+    """LlamaIndex vector store over any BaseVectorStore, reporting its cosine similarities as node scores."""
+    
+    stores_text: bool = True
+    _store: Any = PrivateAttr()
+    
+    def __init__(self, store, **kwargs):
+        super().__init__(**kwargs)
+        self._store = store
+    
+    @property
+    def client(self) -> Any:
+        return self._store
+    
+    def add(self, nodes: List[BaseNode], **add_kwargs: Any) -> List[str]:
+        ids = [node.node_id for node in nodes]
+        self._store.upsert(
+            ids=ids,
+            embeddings=[node.get_embedding() for node in nodes],
+            documents=[node.get_content() for node in nodes],
+            metadatas=[node_to_metadata_dict(node, remove_text=True, flat_metadata=False) for node in nodes]
+        )
+        self._store.persist()
+        return ids
+    
+    def delete(self, ref_doc_id: str, **delete_kwargs: Any) -> None:
+        self._store.delete_where({"ref_doc_id": ref_doc_id})
+        self._store.persist()
+    
+    def query(self, query: VectorStoreQuery, **kwargs: Any) -> VectorStoreQueryResult:
+        where = filters_to_where(query.filters) if query.filters else None
+        results = self._store.query(query.query_embedding, n_results=query.similarity_top_k, where=where)
+        
+        nodes = []
+        for result in results:
+            node = metadata_dict_to_node(result['metadata'])
+            node.set_content(result['content'])
+            nodes.append(node)
+        
+        return VectorStoreQueryResult(
+            nodes=nodes,
+            similarities=[result['score'] for result in results],
+            ids=[result['id'] for result in results]
+        )
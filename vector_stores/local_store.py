@@ -0,0 +1,392 @@
+import contextlib
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from .base import BaseVectorStore
+
+try:
+    import fcntl
+except ImportError:  # Windows: the store is then safe for one process at a time only
+    fcntl = None
+
+SQL_OPERATORS = {'$eq': '=', '$ne': '!=', '$gt': '>', '$gte': '>=', '$lt': '<', '$lte': '<='}
+
+def where_to_sql(where: Dict[str, Any]) -> Tuple[str, List[Any]]:
+    """Translate a Chroma-style where clause into SQL over the JSON metadata column."""
+    clauses = []
+    params = []
+    for key, condition in where.items():
+        if key in ('$and', '$or'):
+            parts = [where_to_sql(sub_where) for sub_where in condition]
+            clauses.append('(' + f' {key[1:].upper()} '.join(sql for sql, _ in parts) + ')')
+            params.extend(param for _, sub_params in parts for param in sub_params)
+            continue
+        
+        if not isinstance(condition, dict):
+            condition = {'$eq': condition}
+        for operator, value in condition.items():
+            column = "json_extract(metadata, ?)"
+            params.append(f'$."{key}"')
+            if operator in ('$in', '$nin'):
+                negation = 'NOT ' if operator == '$nin' else ''
+                clauses.append(f"{column} {negation}IN ({', '.join('?' * len(value))})")
+                params.extend(value)
+            else:
+                clauses.append(f"{column} {SQL_OPERATORS[operator]} ?")
+                params.append(value)
+    
+    return ' AND '.join(clauses) or '1', params
+
+class LocalVectorStore(BaseVectorStore):
+    """In-process vector store: normalized float32 vectors in a memory-mapped file,
+    a SQLite metadata sidecar and an HNSW index persisted to disk."""
+    
+    # Several processes may open one store, e.g. the Streamlit server while a CLI re-indexes. Writes
+    # hold an exclusive file lock and reads a shared one. Every write bumps 'version' in the info
+    # table; a process that sees a new version catches up before touching rows, and reopens the
+    # store entirely when a compaction or reset bumped 'generation' and renumbered the rows.
+    
+    def __init__(self, path: str, collection_name: str = "documents", M: int = 16,
+                 ef_construction: int = 200, ef_search: int = 64, compact_ratio: float = 0.3):
+        self.dir = Path(path) / collection_name
+        self.hnsw_params = {'M': M, 'ef_construction': ef_construction, 'ef_search': ef_search}
+        self.compact_ratio = compact_ratio
+        self._lock = threading.RLock()
+        self._open()
+    
+    def _open(self):
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.dir / "index.hnsw"
+        self._lock_file = open(self.dir / "store.lock", 'a+')
+        self.db = sqlite3.connect(str(self.dir / "metadata.sqlite"), check_same_thread=False)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS chunks "
+            "(row INTEGER PRIMARY KEY, id TEXT UNIQUE, source TEXT, document TEXT, metadata TEXT)"
+        )
+        self.db.execute("CREATE TABLE IF NOT EXISTS info (key TEXT PRIMARY KEY, value INTEGER)")
+        self.db.commit()
+        with self._locked(exclusive=False, refresh=False):
+            self._load_state(self._read_info())
+    
+    def _read_info(self) -> Dict[str, int]:
+        return dict(self.db.execute("SELECT key, value FROM info"))
+    
+    def _load_state(self, info: Dict[str, int]):
+        """(Re)open the vector file and HNSW index described by the info table."""
+        self.dim = info.get('dim')
+        self.count = info.get('count', 0)  # Rows written, including replaced/deleted ones
+        self.capacity = info.get('capacity', 0)
+        self.generation = info.get('generation', 0)  # Bumped by compaction and reset, which renumber rows
+        self.version = info.get('version', 0)  # Bumped by every write
+        self.indexed_version = info.get('indexed_version')  # Version the saved HNSW index reflects
+        self.vectors_path = self._vectors_path(self.generation)
+        self.vectors = None
+        self.index = None
+        self._index_rows = set()  # Rows live in this process's HNSW index
+        self._live_rows = None
+        if self.dim:
+            self._open_vectors()
+            self._load_index()
+    
+    @contextlib.contextmanager
+    def _locked(self, exclusive: bool, refresh: bool = True):
+        """Hold the thread lock and the cross-process file lock, catching up with other processes' writes first."""
+        with self._lock:
+            if fcntl:
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                if refresh:
+                    self._refresh()
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+    
+    def _refresh(self):
+        """Pick up writes other processes committed since this one last looked."""
+        info = self._read_info()
+        if info.get('version', 0) == self.version:
+            return
+        if info.get('generation', 0) != self.generation or info.get('dim') != self.dim:
+            self._load_state(info)
+            return
+        
+        # Rows were appended or deleted: map the grown file and bring the HNSW index up to date
+        self.count = info.get('count', 0)
+        self.version = info.get('version', 0)
+        self.indexed_version = info.get('indexed_version')
+        if info.get('capacity', 0) != self.capacity:
+            self.capacity = info.get('capacity', 0)
+            self.vectors = None
+            self._open_vectors()
+            if self.index is not None:
+                self.index.resize_index(self.capacity)
+        self._live_rows = None
+        self._sync_index()
+    
+    def _sync_index(self):
+        """Add live rows missing from the HNSW index and mark rows deleted elsewhere."""
+        if self.index is None:
+            return
+        live = set(self._rows().tolist())
+        added = sorted(live - self._index_rows)
+        if added:
+            self.index.add_items(self.vectors[added], added)
+        for row in self._index_rows - live:
+            self.index.mark_deleted(row)
+        self._index_rows = live
+    
+    def _committed(self):
+        """Record a write in the info table and commit it, so other processes see it."""
+        self.version += 1
+        self._save_info()
+        self.db.commit()
+    
+    def _vectors_path(self, generation: int) -> Path:
+        return self.dir / (f"vectors.{generation}.f32" if generation else "vectors.f32")
+    
+    def _open_vectors(self):
+        import numpy as np
+        self.vectors = np.memmap(self.vectors_path, dtype=np.float32, mode='r+', shape=(self.capacity, self.dim))
+    
+    def _ensure_capacity(self, needed: int):
+        """Grow the vector file (and HNSW index) geometrically to hold needed rows."""
+        if needed <= self.capacity:
+            return
+        new_capacity = max(needed, self.capacity * 2, 1024)
+        if self.vectors is not None:
+            self.vectors.flush()
+            self.vectors = None
+        with open(self.vectors_path, 'a+b') as f:
+            f.truncate(new_capacity * self.dim * 4)
+        self.capacity = new_capacity
+        self._open_vectors()
+        if self.index is not None:
+            self.index.resize_index(new_capacity)
+    
+    def _load_index(self):
+        """Load the persisted HNSW index, or build it; without hnswlib queries fall back to exact search."""
+        try:
+            import hnswlib
+        except ImportError:
+            return
+        
+        self.index = hnswlib.Index(space='ip', dim=self.dim)
+        rows = self._rows()
+        # Rebuild when there is no saved index or it missed writes after the last persist()
+        if self.index_path.exists() and self.indexed_version == self.version:
+            self.index.load_index(str(self.index_path), max_elements=self.capacity)
+        else:
+            self.index.init_index(
+                max_elements=max(self.capacity, 1),
+                M=self.hnsw_params['M'],
+                ef_construction=self.hnsw_params['ef_construction']
+            )
+            if len(rows):
+                self.index.add_items(self.vectors[rows], rows)
+        self._index_rows = set(rows.tolist())
+        self.index.set_ef(self.hnsw_params['ef_search'])
+    
+    def _rows(self, where: Optional[Dict[str, Any]] = None):
+        """Row numbers of live chunks, optionally filtered by a where clause."""
+        import numpy as np
+        if where:
+            sql, params = where_to_sql(where)
+            return np.array([row for row, in self.db.execute(f"SELECT row FROM chunks WHERE {sql}", params)], dtype=np.int64)
+        if self._live_rows is None:
+            self._live_rows = np.array([row for row, in self.db.execute("SELECT row FROM chunks ORDER BY row")], dtype=np.int64)
+        return self._live_rows
+    
+    def _save_info(self):
+        self.db.executemany(
+            "INSERT OR REPLACE INTO info (key, value) VALUES (?, ?)",
+            [('dim', self.dim), ('count', self.count), ('capacity', self.capacity), ('generation', self.generation),
+             ('version', self.version), ('indexed_version', self.indexed_version)]
+        )
+    
+    def get_sources(self) -> Dict[str, str]:
+        with self._locked(exclusive=False):
+            return dict(self.db.execute("SELECT id, source FROM chunks"))
+    
+    def upsert(self, ids: List[str], embeddings: List[List[float]], documents: List[str], metadatas: List[Dict[str, Any]]):
+        import numpy as np
+        if not ids:
+            return
+        
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        vectors /= np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+        
+        with self._locked(exclusive=True):
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                self._ensure_capacity(len(ids))
+                self._load_index()
+            
+            # Replaced chunks leave their old row behind as a tombstone
+            self._delete_rows(self._rows_for_ids(ids))
+            
+            start = self.count
+            self._ensure_capacity(start + len(ids))
+            self.vectors[start:start + len(ids)] = vectors
+            # Flushed before the commit, so other processes never see rows whose vectors are not on disk yet
+            self.vectors.flush()
+            self.db.executemany(
+                "INSERT INTO chunks (row, id, source, document, metadata) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (start + i, id_, (metadata or {}).get('source'), document, json.dumps(metadata or {}))
+                    for i, (id_, document, metadata) in enumerate(zip(ids, documents, metadatas))
+                ]
+            )
+            if self.index is not None:
+                self.index.add_items(vectors, np.arange(start, start + len(ids)))
+                self._index_rows.update(range(start, start + len(ids)))
+            self.count += len(ids)
+            self._live_rows = None
+            self._committed()
+    
+    def _rows_for_ids(self, ids: List[str]) -> List[int]:
+        rows = []
+        for start in range(0, len(ids), 500):
+            batch = ids[start:start + 500]
+            rows.extend(row for row, in self.db.execute(
+                f"SELECT row FROM chunks WHERE id IN ({', '.join('?' * len(batch))})", batch
+            ))
+        return rows
+    
+    def _delete_rows(self, rows: List[int]):
+        if not rows:
+            return
+        self.db.executemany("DELETE FROM chunks WHERE row = ?", [(row,) for row in rows])
+        if self.index is not None:
+            for row in rows:
+                self.index.mark_deleted(row)
+            self._index_rows.difference_update(rows)
+        self._live_rows = None
+    
+    def delete(self, ids: List[str]):
+        with self._locked(exclusive=True):
+            self._delete_rows(self._rows_for_ids(ids))
+            self._committed()
+    
+    def delete_where(self, where: Dict[str, Any]):
+        """Delete every chunk matching a where clause."""
+        with self._locked(exclusive=True):
+            self._delete_rows(self._rows(where).tolist())
+            self._committed()
+    
+    def query(self, embedding: List[float], n_results: int = 5, where: Optional[Dict[str, Any]] = None) -> List[Dict]:
+        import numpy as np
+        query = np.asarray(embedding, dtype=np.float32)
+        query /= max(float(np.linalg.norm(query)), 1e-12)
+        
+        with self._locked(exclusive=False):
+            if self.dim is None:
+                return []
+            candidates = self._rows(where)
+            k = min(n_results, len(candidates))
+            if k == 0:
+                return []
+            
+            rows = None
+            if self.index is not None:
+                allowed = set(candidates.tolist()) if where else None
+                try:
+                    labels, distances = self.index.knn_query(
+                        query, k=k, filter=(lambda row: row in allowed) if allowed is not None else None
+                    )
+                    rows, scores = labels[0], 1.0 - distances[0]
+                except RuntimeError:
+                    rows = None  # HNSW could not return k results; fall back to exact search
+            
+            if rows is None:
+                all_scores = self.vectors[candidates] @ query
+                top = np.argpartition(-all_scores, k - 1)[:k]
+                top = top[np.argsort(-all_scores[top])]
+                rows, scores = candidates[top], all_scores[top]
+            
+            rows = [int(row) for row in rows]
+            chunks = {
+                row: (id_, document, metadata)
+                for row, id_, document, metadata in self.db.execute(
+                    f"SELECT row, id, document, metadata FROM chunks WHERE row IN ({', '.join('?' * len(rows))})", rows
+                )
+            }
+        
+        documents = []
+        for row, score in zip(rows, scores):
+            if row not in chunks:
+                continue  # Defensive: the SQLite row vanished under the index
+            id_, document, metadata = chunks[row]
+            documents.append({
+                'id': id_,
+                'content': document,
+                'metadata': json.loads(metadata),
+                'distance': 1.0 - float(score),
+                'score': float(score)
+            })
+        
+        return documents
+    
+    def _compact(self):
+        """Rewrite the live rows contiguously into a new vector file and rebuild the HNSW index without tombstones."""
+        import numpy as np
+        rows = self._rows()
+        capacity = max(len(rows), 1024)
+        generation = self.generation + 1
+        new_path = self._vectors_path(generation)
+        
+        compacted = np.memmap(new_path, dtype=np.float32, mode='w+', shape=(capacity, self.dim))
+        for start in range(0, len(rows), 4096):
+            batch = rows[start:start + 4096]
+            compacted[start:start + len(batch)] = self.vectors[batch]
+        compacted.flush()
+        del compacted
+        
+        # Renumbering in ascending order never collides: each new row number is at most its old one
+        self.db.executemany("UPDATE chunks SET row = ? WHERE row = ?",
+                            [(new_row, int(old_row)) for new_row, old_row in enumerate(rows)])
+        old_path = self.vectors_path
+        self.count, self.capacity, self.generation = len(rows), capacity, generation
+        # The commit switches every process to the new file, so a crash before it leaves the old store intact
+        self._committed()
+        
+        self.vectors = None
+        self.vectors_path = new_path
+        self._open_vectors()
+        self._live_rows = None
+        self._load_index()
+        # Processes still mapping the old file keep it readable until they reopen
+        os.remove(old_path)
+    
+    def persist(self):
+        with self._locked(exclusive=True):
+            if self.dim and self.count and (self.count - len(self._rows())) / self.count > self.compact_ratio:
+                self._compact()
+            if self.vectors is not None:
+                self.vectors.flush()
+            if self.index is not None:
+                # Write then rename so other processes never load a half-written index
+                tmp_path = self.index_path.with_suffix('.tmp')
+                self.index.save_index(str(tmp_path))
+                os.replace(tmp_path, self.index_path)
+                self.indexed_version = self.version
+                self._save_info()
+            self.db.commit()
+    
+    def reset(self):
+        with self._locked(exclusive=True):
+            # The SQLite file stays, so processes holding it open see the new generation and reopen
+            self.db.execute("DELETE FROM chunks")
+            for path in self.dir.glob("vectors*.f32"):
+                path.unlink()
+            self.index_path.unlink(missing_ok=True)
+            generation, version = self.generation + 1, self.version
+            self._load_state({'generation': generation, 'version': version})
+            self._committed()
+    
+    def as_llama_vector_store(self):
+        from .llama_adapter import LlamaVectorStoreAdapter
+        return LlamaVectorStoreAdapter(self)